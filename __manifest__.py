@@ -1,6 +1,6 @@
 {
     'name': 'TECH 3.0 Srl Repairs',
-    'version': '1.0',
+    'version': '1.6',
     'summary': 'Repair Orders in Odoo 18',
     'description': 'Management Tech Laboratory with Clients Online Chat',
     'author': 'TECH 3.0 Srl',
@@ -25,6 +25,9 @@
         'views/config/repair_worktype.xml',
         'views/report/repair_order_report.xml',
         'views/report/repair_order_two_copies_report.xml',
+        'views/report/repair_report_batch_views.xml',
+        'views/report/repair_margin_report_views.xml',
+        'views/report/repair_perf_views.xml',
         
         'views/repair_management_main_menu.xml',
         
@@ -1,8 +1,18 @@
 from odoo import http
 from odoo.http import request
+from odoo.tools import lru
+from odoo.addons.tech_repair_management.models.repair_perf import instrumented
+import base64
+import hashlib
 import logging
 
 
+# Rendered /repairstatus pages, keyed by (database, token, ETag).
+# The ETag changes on every write of the order and on every new chat message,
+# so stale entries are never served and simply fall out of the LRU.
+_status_page_cache = lru.LRU(512)
+
+
 class RepairController(http.Controller):
     _inherit = ['mail.channel']
 
@@ -10,38 +20,111 @@ class RepairController(http.Controller):
 
     # public string to display the job
     @http.route('/repairstatus/<string:token>', type='http', auth="public", website=True)
+    @instrumented('/repairstatus')
     def tech_repair_status(self, token, **kwargs):
         # Force Odoo to use a db
         db_name = request.httprequest.args.get('db')
         if db_name:
             request.session.db = db_name
             
-        tech_repair_order = request.env['tech.repair.order'].sudo().search([('token_url', '=', token)], limit=1)
-
-        # Filter only messages for the customer
-        chat_messages = request.env['tech.repair.chat.message'].sudo().search([
-            ('tech_repair_order_id.token_url', '=', token)
-        ], order='create_date asc')
-
-        # Debug log
-        #self._logger.info("Messages found for repair %s: %s", token, chat_messages)
+        tech_repair_order = request.env['tech.repair.order'].sudo()._get_by_token(token)
+
+        if not tech_repair_order:
+            return request.render('tech_repair_management.tech_repair_status_page', {'repair': tech_repair_order})
+
+        # Conditional request: nothing changed since the customer's last load
+        etag = self._get_status_page_etag(tech_repair_order)
+        if request.httprequest.if_none_match.contains(etag):
+            response = request.make_response('', status=304)
+            response.set_etag(etag)
+            return response
+
+        cache_key = (request.env.cr.dbname, token, etag)
+        html = _status_page_cache.get(cache_key)
+        if html is None:
+            html = self._render_status_page(tech_repair_order)
+            _status_page_cache[cache_key] = html
+
+        response = request.make_response(html, [('Content-Type', 'text/html; charset=utf-8'), ('Cache-Control', 'private, no-cache')])
+        response.set_etag(etag)
+        return response
+
+    def _get_status_page_etag(self, tech_repair_order):
+        # Version of the page: last write of the order plus the newest chat message.
+        # Session, user and language are included because the page embeds the CSRF token and translations.
+        last_message = request.env['tech.repair.chat.message'].sudo().search([
+            ('tech_repair_order_id', '=', tech_repair_order.id)
+        ], order='id desc', limit=1)
+        version = f"{tech_repair_order.id}-{tech_repair_order.last_modified_date}-{last_message.id}-{request.session.sid}-{request.env.uid}-{request.env.lang}"
+        return hashlib.sha1(version.encode()).hexdigest()
+
+    def _render_status_page(self, tech_repair_order):
+        # Latest page of the chat only: older messages and new replies are loaded by the chat API
+        chat_page = request.env['tech.repair.chat.message'].sudo()._get_chat_page(tech_repair_order)
 
         return request.render('tech_repair_management.tech_repair_status_page', {
             'repair': tech_repair_order,
             'customer_state': tech_repair_order.customer_state_id.name if tech_repair_order.customer_state_id else "Status not yet available",
             'open_date': tech_repair_order.open_date.strftime('%d/%m/%Y %H:%M') if tech_repair_order.open_date else "Date not available",
             'last_modified_date': tech_repair_order.last_modified_date.strftime('%d/%m/%Y %H:%M') if tech_repair_order.last_modified_date else "Date not available",
-            'chat_messages': chat_messages,
-        })
+            'chat_messages': chat_page['messages'],
+            'chat_has_more': chat_page['has_more'],
+        }, lazy=False)
+
+    # Chat of the status page, paginated by message id: "before" loads older pages, "after" new messages
+    @http.route('/repairstatus/<string:token>/messages', type='json', auth="public", website=True)
+    @instrumented('/repairstatus/messages')
+    def chat_messages(self, token, before=None, after=None, limit=None, **kwargs):
+        tech_repair_order = request.env['tech.repair.order'].sudo()._get_by_token(token)
+        if not tech_repair_order:
+            raise request.not_found()
+        return request.env['tech.repair.chat.message'].sudo()._get_chat_page(tech_repair_order, before=before, after=after, limit=limit)
+
+    # public image of the customer QR code, rendered on first access
+    @http.route('/repairstatus/qr/<string:token>', type='http', auth="public")
+    @instrumented('/repairstatus/qr')
+    def repair_qr_code(self, token, **kwargs):
+        tech_repair_order = request.env['tech.repair.order'].sudo()._get_by_token(token)
+        if not tech_repair_order:
+            return request.not_found()
+        return self._make_qr_response(tech_repair_order._get_qr_code_content(self._get_base_url()))
+
+    # internal QR code image, for the backend and the reports
+    @http.route('/repairstatus/qr_int/<int:order_id>', type='http', auth="user")
+    @instrumented('/repairstatus/qr_int')
+    def repair_qr_code_int(self, order_id, **kwargs):
+        tech_repair_order = request.env['tech.repair.order'].browse(order_id).exists()
+        if not tech_repair_order:
+            return request.not_found()
+        return self._make_qr_response(tech_repair_order._get_qr_code_int_content(self._get_base_url()))
+
+    def _get_base_url(self):
+        return request.env['tech.repair.config']._get_base_url()
+
+    def _make_qr_response(self, url):
+        QrCode = request.env['tech.repair.qr.code'].sudo()
+        image = QrCode._get_image(url)
+        if not image:
+            return request.not_found()
+
+        # The image only depends on the encoded URL, so the URL hash is a stable ETag
+        etag = QrCode._hash_url(url)
+        if request.httprequest.if_none_match.contains(etag):
+            response = request.make_response('', status=304)
+        else:
+            response = request.make_response(base64.b64decode(image), [('Content-Type', 'image/png'), ('Cache-Control', 'private, max-age=86400')])
+        response.set_etag(etag)
+        return response
 
     # public string to send messages
     @http.route('/repairstatus/send_message', type='http', auth="public", methods=['POST'], website=True)
+    @instrumented('/repairstatus/send_message')
     def send_message(self, **post):
         token = post.get('token')
         customer_message = post.get('customer_message')  # Correct field name from form
 
         if token and customer_message:
-            tech_repair_order = request.env['tech.repair.order'].sudo().search([('token_url', '=', token)], limit=1)
+            tech_repair_order = request.env['tech.repair.order'].sudo()._get_by_token(token)
             if tech_repair_order.exists():
                 # Save the message in the `tech.repair.chat.message` table
                 request.env['tech.repair.chat.message'].sudo().create({
@@ -64,9 +147,10 @@ class RepairController(http.Controller):
 
     # public string to generate pdf via token
     @http.route('/repairstatus/pdf/<string:token>', type='http', auth="public", website=True)
+    @instrumented('/repairstatus/pdf')
     def download_repair_pdf(self, token, **kwargs):
         
-        repair_order = request.env['tech.repair.order'].sudo().search([('token_url', '=', token)], limit=1)
+        repair_order = request.env['tech.repair.order'].sudo()._get_by_token(token)
 
         if not repair_order.exists():
             #self._logger.error(f"No repair found for token: {token}")
@@ -80,25 +164,58 @@ class RepairController(http.Controller):
             #self._logger.error("Error: Report does not exist in Odoo")
             return request.make_response("Error: Report does not exist.", [('Content-Type', 'text/plain')])
 
-        # Generate PDF with single ID (not a list)
-        try:
-            # Generate PDF using report name
-            pdf_content, content_type = request.env['ir.actions.report']._render_qweb_pdf(
-                'tech_repair_management.action_report_repair_order', [repair_order.id]
+        # The PDF is rendered by the report queue (cron), never inside this public worker
+        job = request.env['tech.repair.report.job'].sudo()._get_job(repair_order, 'tech_repair_management.action_report_repair_order')
+        if job.state == 'failed':
+            # The error may expose server internals: it stays in the log and on the job
+            self._logger.error("PDF of repair %s not available: %s", repair_order.name, job.error)
+            return request.make_response(
+                "The PDF is temporarily unavailable, please try again later.",
+                [('Content-Type', 'text/plain'), ('Cache-Control', 'no-store')],
+                status=503,
             )
-            #self._logger.info(f"PDF generated successfully for ID: {repair_order.id}")
 
-        except Exception as e:
-            #self._logger.error(f"Error generating PDF: {str(e)}")
-            return request.make_response(f"Error generating PDF: {str(e)}", [('Content-Type', 'text/plain')])
+        pdf_content = job._get_pdf()
+        if not pdf_content:
+            # Still rendering: the browser retries automatically
+            return request.make_response(
+                "<html><body><p>Generating the PDF&#8230; this page will refresh automatically.</p></body></html>",
+                [('Content-Type', 'text/html; charset=utf-8'), ('Refresh', '3'), ('Cache-Control', 'no-store')],
+                status=202,
+            )
 
-            # Return PDF as response
+        # Return PDF as response
         pdf_filename = f"Repair_{repair_order.name}.pdf"
         return request.make_response(pdf_content, [
             ('Content-Type', 'application/pdf'),
             ('Content-Disposition', f'attachment; filename={pdf_filename}')
         ])
 
-
-
-    
\ No newline at end of file
+    # Bulk check-in of scanned serials (JSON-RPC), e.g. from a handheld scanner
+    @http.route('/repair/inventory/checkin', type='json', auth="user", methods=['POST'])
+    def inventory_check_in(self, model_id, serials, model_variant=False, notes=False, **kwargs):
+        return request.env['tech.repair.inventory'].check_in_serials(int(model_id), serials, model_variant, notes)
+
+    # Device catalog (category, brand, model, variant) for external clients that filter locally,
+    # e.g. intake apps and handheld scanners. The backend form keeps its onchanges.
+    # The ETag is the catalog version: unchanged catalogs cost a 304 and no query on the tree.
+    @http.route('/repair/catalog', type='http', auth="user", methods=['GET'])
+    def device_catalog(self, **kwargs):
+        DeviceModel = request.env['tech.repair.device.model']
+        version = DeviceModel._get_catalog_version()
+        etag = f'catalog-{request.env.cr.dbname}-{version}'
+        if request.httprequest.if_none_match.contains(etag):
+            response = request.make_response('', status=304)
+        else:
+            response = request.make_response(DeviceModel._get_catalog_json(version), [
+                ('Content-Type', 'application/json'),
+            ])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.set_etag(etag)
+        return response
+
+    # Resolves scanned QR codes, repair numbers or serials; "payloads" resolves a stack of labels at once
+    @http.route('/repair/scan', type='json', auth="user", methods=['POST'])
+    def resolve_scan(self, payload=None, payloads=None, **kwargs):
+        results = request.env['tech.repair.order'].resolve_scans(payloads if payloads is not None else [payload])
+        return results if payloads is not None else results[0]
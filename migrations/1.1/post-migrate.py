@@ -0,0 +1,24 @@
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+
+# Backfill of the stored expected_total, batch by batch to keep memory bounded
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+    RepairOrder = env['tech.repair.order']
+    field = RepairOrder._fields['expected_total']
+
+    cr.execute("SELECT id FROM tech_repair_order WHERE expected_total IS NULL ORDER BY id")
+    ids = [row[0] for row in cr.fetchall()]
+    for start in range(0, len(ids), BATCH_SIZE):
+        orders = RepairOrder.browse(ids[start:start + BATCH_SIZE])
+        env.add_to_compute(field, orders)
+        orders.flush_recordset(['expected_total'])
+        env.invalidate_all()
+        _logger.info("expected_total backfilled for %s/%s repair orders", min(start + BATCH_SIZE, len(ids)), len(ids))
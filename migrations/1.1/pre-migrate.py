@@ -0,0 +1,9 @@
+# expected_total becomes a stored field: create the column here so that the
+# module update does not recompute every order in a single transaction.
+# The values are backfilled in batches by post-migrate.py.
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE tech_repair_order ADD COLUMN IF NOT EXISTS expected_total numeric")
@@ -0,0 +1,14 @@
+# revenue_amount, cost_amount and margin_amount are new stored fields: create the
+# columns here so that the module update does not compute every order at once.
+# The values are backfilled in batches by post-migrate.py.
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("""
+        ALTER TABLE tech_repair_order
+            ADD COLUMN IF NOT EXISTS revenue_amount numeric,
+            ADD COLUMN IF NOT EXISTS cost_amount numeric,
+            ADD COLUMN IF NOT EXISTS margin_amount numeric
+    """)
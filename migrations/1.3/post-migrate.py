@@ -0,0 +1,23 @@
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+
+# Backfill of the order search documents, batch by batch to keep memory bounded
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+    RepairOrder = env['tech.repair.order']
+
+    cr.execute("SELECT id FROM tech_repair_order WHERE search_document IS NULL ORDER BY id")
+    ids = [row[0] for row in cr.fetchall()]
+    for start in range(0, len(ids), BATCH_SIZE):
+        orders = RepairOrder.browse(ids[start:start + BATCH_SIZE])
+        env.add_to_compute(RepairOrder._fields['search_document'], orders)
+        orders.flush_recordset(['search_document'])
+        env.invalidate_all()
+        _logger.info("Search documents backfilled for %s/%s repair orders", min(start + BATCH_SIZE, len(ids)), len(ids))
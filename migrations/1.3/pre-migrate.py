@@ -0,0 +1,9 @@
+# search_document is a new stored field: create the column here so that the module
+# update does not compute every order at once. The values are backfilled in batches
+# by post-migrate.py.
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE tech_repair_order ADD COLUMN IF NOT EXISTS search_document text")
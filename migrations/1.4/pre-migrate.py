@@ -0,0 +1,15 @@
+# stimated_date is now a stored field: the column is created and filled with one set-based
+# UPDATE, so that the module update does not compute every order in Python.
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE tech_repair_order ADD COLUMN IF NOT EXISTS stimated_date date")
+    cr.execute("""
+        UPDATE tech_repair_order o
+           SET stimated_date = COALESCE(o.open_date, now() AT TIME ZONE 'UTC')::date + w.stimated_time
+          FROM tech_repair_worktype w
+         WHERE w.id = o.worktype
+           AND COALESCE(w.stimated_time, 0) != 0
+    """)
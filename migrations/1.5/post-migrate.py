@@ -0,0 +1,24 @@
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+
+# The chat is no longer part of the search documents: the documents of the orders
+# with messages are computed again, batch by batch to keep memory bounded
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+    RepairOrder = env['tech.repair.order']
+
+    cr.execute("SELECT DISTINCT tech_repair_order_id FROM tech_repair_chat_message ORDER BY tech_repair_order_id")
+    ids = [row[0] for row in cr.fetchall()]
+    for start in range(0, len(ids), BATCH_SIZE):
+        orders = RepairOrder.browse(ids[start:start + BATCH_SIZE])
+        env.add_to_compute(RepairOrder._fields['search_document'], orders)
+        orders.flush_recordset(['search_document'])
+        env.invalidate_all()
+        _logger.info("Search documents recomputed for %s/%s repair orders", min(start + BATCH_SIZE, len(ids)), len(ids))
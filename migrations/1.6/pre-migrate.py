@@ -0,0 +1,20 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+# Reminders are now tracked per renewal date and the cron also picks up renewals it missed.
+# Renewals already reminded or already expired before the upgrade count as notified,
+# otherwise the first run would send every past reminder at once.
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE tech_repair_order ADD COLUMN IF NOT EXISTS renewal_notified_date date")
+    cr.execute("""
+        UPDATE tech_repair_order
+           SET renewal_notified_date = renewal_date
+         WHERE renewal_date IS NOT NULL
+           AND (reminder_sent OR renewal_date < current_date)
+    """)
+    _logger.info("Renewal reminders marked as sent for %s repair orders", cr.rowcount)
+    cr.execute("UPDATE tech_repair_order SET reminder_sent = renewal_notified_date IS NOT NULL")
@@ -1,9 +1,19 @@
+from . import repair_config
 from . import repair_category
 from . import repair_brand
 from . import repair_model
+from . import repair_reservation
 from . import repair_inventory
+from . import repair_inventory_import
+from . import repair_inventory_checkin
 from . import repair_order_device
 from . import repair_order
+from . import repair_qr_code
+from . import repair_report_job
+from . import repair_report_batch
+from . import repair_margin_report
+from . import repair_perf
+from . import repair_benchmark
 from . import repair_device
 from . import repair_loaner
 from . import repair_state
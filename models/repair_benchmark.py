@@ -0,0 +1,399 @@
+import io
+import json
+import logging
+import random
+import time
+from lxml import etree
+from odoo import models, fields, api, release
+from odoo.exceptions import AccessError
+from odoo.tools.pdf import PdfFileReader, merge_pdf
+
+_logger = logging.getLogger(__name__)
+
+# Scenarios run by default, in this order
+BENCHMARK_SCENARIOS = [
+    'intake', 'create_qr', 'mass_state_change', 'write_batches', 'list_load', 'status_page',
+    'pdf_render', 'batch_print', 'renewal_cron', 'inventory_check_in', 'serial_lookup', 'historical_import',
+]
+
+# Code of the sequence numbering the generated orders
+BENCHMARK_SEQUENCE_CODE = 'tech.repair.order.benchmark'
+
+
+# Synthetic data generator and benchmark suite of the repair module.
+# Headless run against a local database, nothing is committed:
+#   odoo-bin shell -d <db> --no-http <<< "env['tech.repair.benchmark'].run(output='/tmp/repair-bench.json')"
+class RepairBenchmark(models.AbstractModel):
+    _name = 'tech.repair.benchmark'
+    _description = 'Repair Benchmark Suite'
+
+    # ------ DATA GENERATOR ------------
+
+    @api.model
+    def _generate_data(self, customers=200, orders=2000, devices_per_order=2, messages_per_order=4, seed=42):
+        """ Builds a realistic data set: customers, catalog, work types, software, and orders with
+        device lines (from a matching inventory), components, software lines, external labs,
+        credentials, accessories and chat messages. Returns the generated orders. """
+        rng = random.Random(seed)
+        env = self.env
+        started = time.perf_counter()
+
+        categories = env['tech.repair.device.category'].create([{'name': f"Bench Category {i}"} for i in range(5)])
+        brands = env['tech.repair.device.brand'].create([{'name': f"Bench Brand {i}"} for i in range(8)])
+        device_models = env['tech.repair.device.model'].create([{
+            'name': f"Bench Model {i}",
+            'brand_id': brands[i % len(brands)].id,
+            'category_id': categories[i % len(categories)].id,
+        } for i in range(40)])
+        worktypes = env['tech.repair.worktype'].create([{
+            'name': f"Bench Work {i}",
+            'price': 30 + 20 * i,
+            'stimated_time': 1 + i,
+        } for i in range(6)])
+        softwares = env['tech.repair.software'].create([{
+            'name': f"Bench Software {i}",
+            'price': 25 + 10 * i,
+            'renewal_required': i % 2 == 0,
+        } for i in range(4)])
+        states = env['tech.repair.state'].create([
+            {'name': "Bench Open", 'sequence': 1},
+            {'name': "Bench In Progress", 'sequence': 2},
+            {'name': "Bench Closed", 'sequence': 3, 'is_closed': True},
+        ])
+        lab = env['res.partner'].create({'name': "Bench Lab", 'is_company': True})
+        products = env['product.product'].create([{
+            'name': f"Bench Component {i}",
+            'lst_price': 10 + 5 * i,
+            'standard_price': 5 + 3 * i,
+        } for i in range(10)])
+        partners = env['res.partner'].create([{
+            'name': f"Bench Customer {i}",
+            'email': f"bench.customer.{i}@example.com",
+            'phone': f"+39 333 {i:07d}",
+        } for i in range(customers)])
+
+        # Inventory: one available serial per device line, plus 20% spare items
+        device_count = orders * devices_per_order
+        line_models = [device_models[rng.randrange(len(device_models))] for _i in range(device_count)]
+        items_by_model = {}
+        Inventory = env['tech.repair.inventory']
+        for model in set(line_models):
+            needed = line_models.count(model)
+            serials = [f"BENCH-{model.id}-{index:07d}" for index in range(int(needed * 1.2) + 1)]
+            results = Inventory.check_in_serials(model.id, serials)
+            items_by_model[model] = [result['id'] for result in results if result['status'] == 'created']
+
+        RepairOrder = env['tech.repair.order']
+        created = RepairOrder
+        for start in range(0, orders, 500):
+            vals_list = []
+            for index in range(start, min(start + 500, orders)):
+                devices = line_models[index * devices_per_order:(index + 1) * devices_per_order]
+                vals_list.append({
+                    'customer_id': partners[rng.randrange(len(partners))].id,
+                    'worktype': worktypes[rng.randrange(len(worktypes))].id,
+                    'state_id': states[rng.randrange(2)].id,
+                    'problem_description': f"Bench problem {index}: the device does not turn on after a fall",
+                    'device_ids': [(0, 0, {
+                        'category_id': model.category_id.id,
+                        'brand_id': model.brand_id.id,
+                        'model_id': model.id,
+                        'inventory_id': items_by_model[model].pop(),
+                    }) for model in devices],
+                    'components_ids': [(0, 0, {
+                        'product_id': product.id,
+                        'pur_price': product.standard_price,
+                        'lst_price': product.lst_price,
+                        'add_to_sum': True,
+                    }) for product in rng.sample(list(products), 2)],
+                    'software_line_ids': [(0, 0, {
+                        'software_id': softwares[rng.randrange(len(softwares))].id,
+                        'add_to_sum': True,
+                    })] if index % 3 == 0 else [],
+                    'external_lab_ids': [(0, 0, {
+                        'lab_id': lab.id,
+                        'operation_description': "Board-level repair",
+                        'external_cost': 40.0,
+                        'customer_cost': 70.0,
+                        'add_to_sum': True,
+                    })] if index % 10 == 0 else [],
+                    'credential_ids': [(0, 0, {
+                        'service_type': 'icloud',
+                        'username': f"bench{index}@example.com",
+                        'password': 'bench',
+                    })] if index % 4 == 0 else [],
+                    'accessory_ids': [(0, 0, {'name': 'alimentatore'})] if index % 2 == 0 else [],
+                })
+            batch = RepairOrder.create(vals_list)
+            env['tech.repair.chat.message'].create([{
+                'tech_repair_order_id': order.id,
+                'sender': 'customer' if message % 2 == 0 else 'technician',
+                'message': f"Bench message {message} for {order.name}",
+            } for order in batch for message in range(messages_per_order)])
+            created |= batch
+            env.flush_all()
+            env.invalidate_all()
+            _logger.info("Benchmark data: %s/%s repair orders", len(created), orders)
+
+        _logger.info("Benchmark data generated in %.1f s", time.perf_counter() - started)
+        return created, {
+            'states': states, 'worktypes': worktypes, 'partners': partners,
+            'device_models': device_models, 'items_by_model': items_by_model,
+        }
+
+    # ------ BENCHMARK SUITE ------------
+
+    def _measure(self, function):
+        # Milliseconds and queries of a call, flush included, with a cold ORM cache
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        started = time.perf_counter()
+        details = function()
+        self.env.flush_all()
+        result = {
+            'ms': round(1000 * (time.perf_counter() - started), 1),
+            'queries': self.env.cr.sql_log_count - queries,
+        }
+        if details:
+            result['details'] = details
+        return result
+
+    def _scenario_intake(self, orders, data, size=50):
+        partners, worktypes, states = data['partners'], data['worktypes'], data['states']
+        spare = [(model, item_ids) for model, item_ids in data['items_by_model'].items() if item_ids]
+
+        def intake():
+            vals_list = []
+            for index in range(size):
+                model, item_ids = spare[index % len(spare)]
+                if not item_ids:
+                    continue
+                vals_list.append({
+                    'customer_id': partners[index % len(partners)].id,
+                    'worktype': worktypes[index % len(worktypes)].id,
+                    'state_id': states[0].id,
+                    'device_ids': [(0, 0, {
+                        'category_id': model.category_id.id,
+                        'brand_id': model.brand_id.id,
+                        'model_id': model.id,
+                        'inventory_id': item_ids.pop(),
+                    })],
+                })
+            self.env['tech.repair.order'].create(vals_list)
+            return {'orders': len(vals_list)}
+        return self._measure(intake)
+
+    def _scenario_create_qr(self, orders, data, sizes=(1, 100, 1000)):
+        # create() latency with the lazy QR codes, and with the former eager rendering
+        # of both PNGs of every order inside create(). Every batch is rolled back.
+        partners, worktypes, states = data['partners'], data['worktypes'], data['states']
+        RepairOrder = self.env['tech.repair.order']
+        QrCode = self.env['tech.repair.qr.code']
+        base_url = self.env['tech.repair.config']._get_base_url()
+        results = []
+        for size in sizes:
+            for mode in ('lazy', 'eager'):
+                def create():
+                    created = RepairOrder.create([{
+                        'customer_id': partners[index % len(partners)].id,
+                        'worktype': worktypes[index % len(worktypes)].id,
+                        'state_id': states[0].id,
+                    } for index in range(size)])
+                    if mode == 'eager':
+                        for order in created:
+                            QrCode._render_png(order._get_qr_code_content(base_url))
+                            QrCode._render_png(order._get_qr_code_int_content(base_url))
+                with self.env.cr.savepoint(flush=False) as savepoint:
+                    result = self._measure(create)
+                    savepoint.rollback()
+                self.env.invalidate_all()
+                result.update(mode=mode, orders=size, ms_per_order=round(result['ms'] / size, 2))
+                results.append(result)
+        return {'details': results}
+
+    def _scenario_mass_state_change(self, orders, data, size=500):
+        target = orders[:size]
+        return self._measure(lambda: target.write({'state_id': data['states'][1].id}) and {'orders': len(target)})
+
+    def _scenario_write_batches(self, orders, data, sizes=(1, 10, 100, 1000)):
+        # Mass edit (state and problem description) through write, chatter notes included:
+        # for each batch size, the queries must stay flat while the batch grows.
+        # Every batch starts from the same data and is rolled back.
+        RepairOrder = self.env['tech.repair.order']
+        Message = self.env['mail.message']
+        results = []
+        for size in sizes:
+            batch = orders[:size]
+            message_domain = [('model', '=', RepairOrder._name), ('res_id', 'in', batch.ids)]
+            with self.env.cr.savepoint(flush=False) as savepoint:
+                messages = Message.search_count(message_domain)
+                result = self._measure(lambda: batch.write({
+                    'state_id': data['states'][-1].id,
+                    'problem_description': f"Benchmark write of {size} orders",
+                }))
+                result.update(orders=len(batch), messages=Message.search_count(message_domain) - messages)
+                savepoint.rollback()
+            self.env.invalidate_all()
+            results.append(result)
+        return {'details': results}
+
+    def _scenario_list_load(self, orders, data, sizes=(80, 500, 5000)):
+        # Reads of the web client for the list and kanban views: for each number of rows,
+        # web_search_read with the fields of the view
+        RepairOrder = self.env['tech.repair.order']
+        results = []
+        for view_type in ('list', 'kanban'):
+            arch = etree.fromstring(RepairOrder.get_view(view_type=view_type)['arch'])
+            specification = {}
+            for node in arch.iter('field'):
+                field = RepairOrder._fields.get(node.get('name'))
+                if field:
+                    specification[field.name] = {'fields': {'display_name': {}}} if field.type == 'many2one' else {}
+            for size in sizes:
+                result = self._measure(lambda: {'rows': len(RepairOrder.web_search_read([], specification, limit=size)['records'])})
+                result.update(view=view_type, **result.pop('details'))
+                results.append(result)
+        return {'details': results}
+
+    def _scenario_status_page(self, orders, data, size=100):
+        # Data path of /repairstatus/<token>: token lookup, page version and latest chat page.
+        # The QWeb page itself needs an HTTP request (website layout).
+        tokens = orders[:size].mapped('token_url')
+
+        def status_page():
+            RepairOrder = self.env['tech.repair.order'].sudo()
+            Chat = self.env['tech.repair.chat.message'].sudo()
+            for token in tokens:
+                order = RepairOrder._get_by_token(token)
+                Chat.search([('tech_repair_order_id', '=', order.id)], order='id desc', limit=1)
+                order.last_modified_date
+                Chat._get_chat_page(order)
+            return {'pages': len(tokens)}
+        return self._measure(status_page)
+
+    def _scenario_pdf_render(self, orders, data, size=10):
+        def pdf_render():
+            report = self.env['ir.actions.report']
+            pdf, _content_type = report._render_qweb_pdf('tech_repair_management.action_report_repair_order', orders[:size].ids)
+            return {'orders': size, 'bytes': len(pdf)}
+        try:
+            return self._measure(pdf_render)
+        except Exception as e:
+            # e.g. wkhtmltopdf missing on the benchmark host
+            return {'error': str(e)}
+
+    def _scenario_batch_print(self, orders, data, chunk_sizes=(10, 50, 100), size=200):
+        # Pages per second of the batch print against its chunk size: the same orders rendered
+        # chunk by chunk and merged, as the batch print cron does. Every run is rolled back, so
+        # that no chunk is taken from the PDFs stored by the previous one.
+        report_ref = 'tech_repair_management.action_report_repair_order'
+        target = orders[:size]
+        results = []
+        for chunk_size in chunk_sizes:
+            def batch_print():
+                chunk_pdfs = [
+                    self.env['ir.actions.report']._render_qweb_pdf(report_ref, target[start:start + chunk_size].ids)[0]
+                    for start in range(0, len(target), chunk_size)
+                ]
+                pdf = merge_pdf(chunk_pdfs) if len(chunk_pdfs) > 1 else chunk_pdfs[0]
+                return {'pages': len(PdfFileReader(io.BytesIO(pdf), strict=False).pages)}
+            try:
+                with self.env.cr.savepoint(flush=False) as savepoint:
+                    result = self._measure(batch_print)
+                    savepoint.rollback()
+            except Exception as e:
+                # e.g. wkhtmltopdf missing on the benchmark host
+                return {'error': str(e), 'details': results}
+            finally:
+                self.env.invalidate_all()
+            pages = result['details']['pages']
+            result.update(
+                orders=len(target),
+                chunk_size=chunk_size,
+                pages_per_second=round(pages / (result['ms'] / 1000), 1) if result['ms'] else 0,
+            )
+            results.append(result)
+        return {'details': results}
+
+    def _scenario_renewal_cron(self, orders, data, size=500):
+        # Orders with software lines due for renewal in the next month
+        due = orders.filtered('software_line_ids')[:size]
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE tech_repair_order SET renewal_date = current_date + 10, renewal_notified_date = NULL, reminder_sent = false WHERE id IN %s",
+            [tuple(due.ids) or (0,)],
+        )
+        self.env.invalidate_all()
+        return self._measure(lambda: self.env['tech.repair.order'].check_repair_renewals(auto_commit=False) or {'orders': len(due)})
+
+    def _scenario_inventory_check_in(self, orders, data):
+        return {'details': self.env['tech.repair.inventory']._benchmark_check_in(count=10000, model_id=data['device_models'][0].id)}
+
+    def _scenario_serial_lookup(self, orders, data):
+        return {'details': self.env['tech.repair.inventory']._benchmark_serial_lookup(rows=500000)}
+
+    def _scenario_historical_import(self, orders, data, rows=100000, batch_size=1000):
+        # Import of historical orders through the bulk create: numbers, tokens and defaults per batch
+        partners, worktypes, states = data['partners'], data['worktypes'], data['states']
+        RepairOrder = self.env['tech.repair.order']
+
+        def historical_import():
+            for start in range(0, rows, batch_size):
+                RepairOrder.create([{
+                    'customer_id': partners[index % len(partners)].id,
+                    'worktype': worktypes[index % len(worktypes)].id,
+                    'state_id': states[2].id,
+                    'problem_description': f"Historical order {index}",
+                } for index in range(start, min(start + batch_size, rows))])
+                self.env.flush_all()
+                self.env.invalidate_all()
+            return {'rows': rows}
+
+        result = self._measure(historical_import)
+        result['rows_per_second'] = round(rows / (result['ms'] / 1000)) if result['ms'] else 0
+        return result
+
+    @api.model
+    def run(self, scenarios=None, customers=200, orders=2000, output=None, seed=42):
+        """ Generates the data set, runs the scenarios and rolls everything back, the numbers of the
+        repair sequence included (the orders are numbered by a temporary sequence).
+        Returns the results, also written as JSON to ``output`` when given, so that runs can be
+        compared over time. """
+        if not self.env.is_admin():
+            raise AccessError("Only administrators can run the repair benchmark.")
+        results = {
+            'date': fields.Datetime.to_string(fields.Datetime.now()),
+            'database': self.env.cr.dbname,
+            'odoo': release.version,
+            'module_version': self.env['ir.module.module'].search([('name', '=', 'tech_repair_management')]).latest_version,
+            'scale': {'customers': customers, 'orders': orders, 'seed': seed},
+            'scenarios': {},
+        }
+        with self.env.cr.savepoint(flush=False) as savepoint:
+            # Repair numbers come from a throwaway sequence, dropped with the rollback:
+            # the real one must not skip the thousands of numbers of the generated orders
+            self.env['ir.sequence'].sudo().create({
+                'name': "Repair Benchmark Sequence",
+                'code': BENCHMARK_SEQUENCE_CODE,
+                'prefix': "BENCH",
+                'padding': 8,
+                'company_id': False,
+            })
+            benchmark = self.with_context(tech_repair_sequence_code=BENCHMARK_SEQUENCE_CODE)
+            started = time.perf_counter()
+            generated, data = benchmark._generate_data(customers=customers, orders=orders, seed=seed)
+            results['generation_s'] = round(time.perf_counter() - started, 1)
+            for scenario in scenarios or BENCHMARK_SCENARIOS:
+                _logger.info("Benchmark scenario %s", scenario)
+                results['scenarios'][scenario] = getattr(benchmark, f'_scenario_{scenario}')(generated, data)
+            savepoint.rollback()
+        self.env.invalidate_all()
+        # The ormcaches (tokens, configuration, catalog) may hold rolled back records
+        self.env.registry.clear_cache()
+
+        if output:
+            with open(output, 'w') as file:
+                json.dump(results, file, indent=2, default=str)
+            _logger.info("Benchmark results written to %s", output)
+        return results
@@ -1,9 +1,13 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+
+# Messages returned per page by the status page and the chat API
+CHAT_PAGE_SIZE = 50
+
 
 class RepairChatMessage(models.Model):
     _name = 'tech.repair.chat.message'
     _description = 'Repair Chat Messages'
-    _order = 'create_date asc'
+    _order = 'create_date asc, id asc'
 
     tech_repair_order_id = fields.Many2one(
         'tech.repair.order', 
@@ -17,5 +21,74 @@ class RepairChatMessage(models.Model):
         ('technician', 'Technician')
     ], string="Sender", required=True, default='technician')
 
-    message = fields.Text(string="Message", required=True)
-    create_date = fields.Datetime(string="Date", default=fields.Datetime.now, readonly=True)
\ No newline at end of file
+    # Trigram index: the full-text search of the orders looks into the chat
+    message = fields.Text(string="Message", required=True, index='trigram')
+    create_date = fields.Datetime(string="Date", default=fields.Datetime.now, readonly=True)
+
+    def init(self):
+        # Messages of one order in chat order: pages and incremental loads are index range scans
+        tools.create_index(
+            self.env.cr, 'tech_repair_chat_message_order_date_index', self._table,
+            ['tech_repair_order_id', 'create_date', 'id'],
+        )
+
+    def _get_chat_values(self):
+        return [{
+            'id': message.id,
+            'sender': message.sender,
+            'author': message.tech_repair_order_id.customer_id.name if message.sender == 'customer'
+                      else f"Technician ({message.tech_repair_order_id.assigned_to.name})",
+            'date': message.create_date.strftime('%d/%m/%Y %H:%M'),
+            'message': message.message,
+        } for message in self]
+
+    @api.model
+    def _parse_int(self, value):
+        # Query string parameters of the public chat routes: anything but a positive integer is ignored
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return None
+        return value if value > 0 else None
+
+    @api.model
+    def _get_chat_page(self, order, before=None, after=None, limit=CHAT_PAGE_SIZE):
+        """ Cursor pagination on the chat of ``order``, by message id.
+
+        ``before``: the ``limit`` messages preceding that message (older pages).
+        ``after``: the messages following that message (new messages).
+        Neither: the latest ``limit`` messages. Messages are returned in chat order.
+        An invalid or foreign ``after`` cursor returns no message, an invalid ``before`` the latest page.
+        """
+        limit = max(1, min(self._parse_int(limit) or CHAT_PAGE_SIZE, CHAT_PAGE_SIZE))
+        cursor_id = self._parse_int(after or before)
+        cursor = self.browse(cursor_id).exists() if cursor_id else self.browse()
+        if cursor and cursor.tech_repair_order_id != order:
+            cursor = self.browse()
+        if after and not cursor:
+            # Unknown cursor (deleted message, other order, garbage): nothing newer to send
+            return {'messages': [], 'has_more': False}
+        if not cursor:
+            # An unknown "before" cursor falls back to the latest page
+            after = before = None
+
+        where, params = "tech_repair_order_id = %s", [order.id]
+        if cursor:
+            where += " AND (create_date, id) > (%s, %s)" if after else " AND (create_date, id) < (%s, %s)"
+            params += [cursor.create_date, cursor.id]
+        direction = "ASC" if after else "DESC"
+        self.env.cr.execute(f"""
+            SELECT id FROM {self._table}
+             WHERE {where}
+             ORDER BY create_date {direction}, id {direction}
+             LIMIT %s
+        """, params + [limit + 1])
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        has_more = len(ids) > limit
+        ids = ids[:limit]
+        if not after:
+            ids.reverse()
+        return {
+            'messages': self.browse(ids)._get_chat_values(),
+            'has_more': has_more,
+        }
@@ -0,0 +1,78 @@
+from odoo import models, api, tools
+
+# Slow-changing configuration read on the hot paths, cached per database.
+# The cache is cleared by every write on ir.config_parameter (done by Odoo itself),
+# and by the changes of tech.repair.state and tech.repair.term that alter the cached values.
+class RepairConfig(models.AbstractModel):
+    _name = 'tech.repair.config'
+    _description = 'Repair Configuration Cache'
+
+    @api.model
+    @tools.ormcache()
+    def _get_config_values(self):
+        return self._compute_config_values()
+
+    @api.model
+    def _compute_config_values(self):
+        env = self.sudo().env
+        state = env['tech.repair.state'].search([], order="sequence asc", limit=1)
+        term = env['tech.repair.term'].search([('predefinita', '=', True)], limit=1)
+        template = env.ref('tech_repair_management.email_template_repair_renewal', raise_if_not_found=False)
+        return tools.frozendict({
+            'base_url': env['ir.config_parameter'].get_param('web.base.url'),
+            'default_state_id': state.id,
+            'default_term_id': term.id,
+            'renewal_template_id': template.id if template else False,
+        })
+
+    @api.model
+    def _get_base_url(self):
+        return self._get_config_values()['base_url']
+
+    @api.model
+    def _get_default_state(self):
+        return self.env['tech.repair.state'].browse(self._get_config_values()['default_state_id'])
+
+    @api.model
+    def _get_default_term(self):
+        return self.env['tech.repair.term'].browse(self._get_config_values()['default_term_id'])
+
+    @api.model
+    def _get_renewal_template(self):
+        return self.env['mail.template'].browse(self._get_config_values()['renewal_template_id'])
+
+# Clears the configuration cache when the records it holds have changed
+class RepairConfigCacheMixin(models.AbstractModel):
+    _name = 'tech.repair.config.cache.mixin'
+    _description = 'Repair Configuration Cache Invalidation'
+    # Fields read by the configuration cache: writing anything else keeps it
+    _config_cache_fields = ()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        old_values = self.env['tech.repair.config']._compute_config_values()
+        records = super().create(vals_list)
+        self._clear_config_cache(old_values)
+        return records
+
+    def write(self, vals):
+        if set(vals).isdisjoint(self._config_cache_fields):
+            return super().write(vals)
+        old_values = self.env['tech.repair.config']._compute_config_values()
+        res = super().write(vals)
+        self._clear_config_cache(old_values)
+        return res
+
+    def unlink(self):
+        old_values = self.env['tech.repair.config']._compute_config_values()
+        res = super().unlink()
+        self._clear_config_cache(old_values)
+        return res
+
+    @api.model
+    def _clear_config_cache(self, old_values):
+        # The whole registry cache is cleared (in every worker) only when the values really changed.
+        # Compared with a snapshot read before the change, not with the cache of this worker,
+        # which may be cold (then filled with the new values) while the others still hold the old ones.
+        if self.env['tech.repair.config']._compute_config_values() != old_values:
+            self.env.registry.clear_cache()
@@ -1,7 +1,62 @@
-from odoo import models, fields
+import json
+from odoo import models, fields, api, tools
+
+# Version of the device catalog, bumped after the commit of every change of the catalog fields
+CATALOG_VERSION_PARAM = 'tech_repair_management.device_catalog_version'
+
+
+# Keeps the device catalog version up to date on every change of the catalog fields
+class RepairDeviceCatalogMixin(models.AbstractModel):
+    _name = 'tech.repair.device.catalog.mixin'
+    _description = 'Device Catalog Versioning'
+    # Fields exported by the catalog: writing anything else leaves the version unchanged
+    _catalog_fields = ('name',)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._bump_catalog_version()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if not set(vals).isdisjoint(self._catalog_fields):
+            self._bump_catalog_version()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._bump_catalog_version()
+        return res
+
+    @api.model
+    def _bump_catalog_version(self):
+        # Bumped once per transaction, after its commit: a version never exists for a rolled back
+        # change, so no catalog built from uncommitted rows can be cached under it.
+        # Atomic increment in SQL: set_param would clear the caches of the whole registry on every
+        # edit, while the catalog JSON is cached by version and simply misses on the new one.
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get(CATALOG_VERSION_PARAM):
+            return
+        postcommit.data[CATALOG_VERSION_PARAM] = True
+        registry, uid = self.env.registry, self.env.uid
+
+        def bump():
+            with registry.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO ir_config_parameter (key, value, create_uid, create_date, write_uid, write_date)
+                    VALUES (%s, '1', %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+                    ON CONFLICT (key) DO UPDATE
+                       SET value = (ir_config_parameter.value::int + 1)::text,
+                           write_uid = EXCLUDED.write_uid,
+                           write_date = EXCLUDED.write_date
+                """, [CATALOG_VERSION_PARAM, uid, uid])
+        postcommit.add(bump)
+
 
 class RepairDeviceCategory(models.Model):
     _name = 'tech.repair.device.category'
+    _inherit = ['tech.repair.device.catalog.mixin']
     _description = 'Repair Device Category'
 
     name = fields.Char(string='Category', required=True)
@@ -9,22 +64,65 @@ class RepairDeviceCategory(models.Model):
 
 class RepairDeviceBrand(models.Model):
     _name = 'tech.repair.device.brand'
+    _inherit = ['tech.repair.device.catalog.mixin']
     _description = 'Repair Device Brand'
 
-    name = fields.Char(string='Brand', required=True)
+    name = fields.Char(string='Brand', required=True, index='trigram')
 
 
 class RepairDeviceModel(models.Model):
     _name = 'tech.repair.device.model'
+    _inherit = ['tech.repair.device.catalog.mixin']
     _description = 'Repair Device Model'
 
-    name = fields.Char(string='Model', required=True)
+    name = fields.Char(string='Model', required=True, index='trigram')
     brand_id = fields.Many2one('tech.repair.device.brand', string='Brand', required=True)
     category_id = fields.Many2one('tech.repair.device.category', string='Category', required=True)
+    _catalog_fields = ('name', 'brand_id', 'category_id')
+
+    @api.model
+    def _get_catalog_version(self):
+        # Read in SQL: get_param is cached and the version is bumped without clearing the caches
+        self.env.cr.execute("SELECT value FROM ir_config_parameter WHERE key = %s", [CATALOG_VERSION_PARAM])
+        row = self.env.cr.fetchone()
+        return int(row[0]) if row else 0
+
+    @api.model
+    def get_catalog(self):
+        """ Whole category/brand/model/variant tree, for pickers that filter locally.
+
+        Rows are compact lists: categories and brands [id, name], models
+        [id, name, brand_id, category_id], variants [id, name, model_id].
+        """
+        return json.loads(self._get_catalog_json(self._get_catalog_version()))
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_catalog_json(self, version):
+        # Built once per version and database: any catalog change bumps the version
+        env = self.sudo().with_context(active_test=True).env
+
+        def rows(model, field_names, order):
+            records = env[model].search_read([], field_names, order=order)
+            return [
+                [rec[name][0] if isinstance(rec[name], (list, tuple)) else rec[name] for name in field_names]
+                for rec in records
+            ]
+
+        return json.dumps({
+            'version': version,
+            'categories': rows('tech.repair.device.category', ['id', 'name'], 'name, id'),
+            'brands': rows('tech.repair.device.brand', ['id', 'name'], 'name, id'),
+            'models': rows('tech.repair.device.model', ['id', 'name', 'brand_id', 'category_id'], 'name, id'),
+            'variants': rows('tech.repair.device.model.variant', ['id', 'name', 'model_id'], 'name, id'),
+        }, separators=(',', ':'))
+
 
 class RepairDeviceModelVariant(models.Model):
     _name = 'tech.repair.device.model.variant'
+    _inherit = ['tech.repair.device.catalog.mixin']
     _description = 'Repair Device Model Variant'
 
     name = fields.Char(string='Variant', required=True)
-    model_id = fields.Many2one('tech.repair.device.model', string='Device Model', required=True)
\ No newline at end of file
+    model_id = fields.Many2one('tech.repair.device.model', string='Device Model', required=True)
+    _catalog_fields = ('name', 'model_id')
@@ -1,9 +1,22 @@
+import logging
+import time
+from psycopg2.errors import UniqueViolation
 from odoo import models, fields, api
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Partial unique index on the serial number of the active items
+SERIAL_INDEX = 'tech_repair_inventory_serial_unique'
+# Partial index behind the serial picker of the device lines (available items of one configuration)
+AVAILABLE_INDEX = 'tech_repair_inventory_available_index'
 
 class RepairInventory(models.Model):
     _name = 'tech.repair.inventory'
+    _inherit = ['tech.repair.reservation.mixin']
     _description = 'Device Inventory'
+    _reservation_assigned_status = 'in_repair'
     _order = 'create_date desc'
 
     name = fields.Char(string='Inventory Reference', compute='_compute_name', store=True)
@@ -16,10 +29,12 @@ class RepairInventory(models.Model):
         store=True,
         readonly=True,
     )
-    brand_id = fields.Many2one('tech.repair.device.brand', string='Brand')  # No required=True here!
-    model_id = fields.Many2one('tech.repair.device.model', string='Model', domain=[],)  # No required=True, no domain in field!
+    brand_id = fields.Many2one('tech.repair.device.brand', string='Brand', index=True)  # No required=True here!
+    # Static domain evaluated on the client: no onchange round-trip to filter the models of the brand
+    model_id = fields.Many2one('tech.repair.device.model', string='Model', domain="[('brand_id', '=?', brand_id)]")  # No required=True here!
     model_variant = fields.Char(string="Variant", help="e.g. 14x4.3")
-    serial_number = fields.Char(string='Serial Number', required=True)
+    # Trigram index: prefix and substring lookups of the serial picker
+    serial_number = fields.Char(string='Serial Number', required=True, index='trigram')
     
     # Status tracking
     status = fields.Selection([
@@ -42,37 +57,318 @@ class RepairInventory(models.Model):
     @api.depends('category_id', 'brand_id', 'model_id', 'model_variant', 'serial_number')
     def _compute_name(self):
         for record in self:
-            parts = []
-            if record.category_id:
-                parts.append(record.category_id.name)
-            if record.brand_id:
-                parts.append(record.brand_id.name)
-            if record.model_id:
-                parts.append(record.model_id.name)
-            if record.model_variant:
-                parts.append(record.model_variant)
-            if record.serial_number:
-                parts.append(f"S/N: {record.serial_number}")
-            record.name = ' - '.join(parts) if parts else 'New Inventory Item'
-
-    @api.constrains('serial_number', 'category_id', 'brand_id', 'model_id', 'model_variant')
-    def _check_unique_serial(self):
-        for record in self:
+            record.name = self._format_name(
+                record.category_id.name, record.brand_id.name, record.model_id.name,
+                record.model_variant, record.serial_number,
+            )
+
+    @api.model
+    def _format_name(self, category, brand, model, variant, serial_number):
+        parts = [part for part in [category, brand, model, variant] if part]
+        if serial_number:
+            parts.append(f"S/N: {serial_number}")
+        return ' - '.join(parts) if parts else 'New Inventory Item'
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE INDEX IF NOT EXISTS {AVAILABLE_INDEX} ON {self._table} (model_id, category_id, brand_id, model_variant)
+             WHERE status = 'available' AND active
+        """)
+
+        # Partial unique index: one active item per serial number and device configuration.
+        # Replaces a search_count per record and is safe against concurrent check-ins.
+        self.env.cr.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [SERIAL_INDEX])
+        if self.env.cr.fetchone():
+            return
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(f"""
+                    CREATE UNIQUE INDEX {SERIAL_INDEX} ON {self._table} (
+                        serial_number, COALESCE(category_id, 0), COALESCE(brand_id, 0),
+                        COALESCE(model_id, 0), COALESCE(model_variant, '')
+                    ) WHERE active
+                """)
+        except UniqueViolation:
+            # Without the index nothing enforces unique serials: the upgrade stops until the duplicates are archived
+            self.env.cr.execute(f"""
+                SELECT serial_number, array_agg(id ORDER BY id)
+                  FROM {self._table}
+                 WHERE active
+                 GROUP BY serial_number, COALESCE(category_id, 0), COALESCE(brand_id, 0),
+                          COALESCE(model_id, 0), COALESCE(model_variant, '')
+                HAVING count(*) > 1
+                 ORDER BY serial_number
+            """)
+            duplicates = self.env.cr.fetchall()
+            raise UserError(
+                "Active inventory items share the same serial number and device, archive the duplicates "
+                "and update the module again:\n" + "\n".join(
+                    f"'{serial}': items {', '.join(map(str, ids))}" for serial, ids in duplicates
+                )
+            ) from None
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        try:
+            with self.env.cr.savepoint():
+                records = super().create(vals_list)
+                records.flush_recordset()
+                return records
+        except UniqueViolation as e:
+            if e.diag.constraint_name != SERIAL_INDEX:
+                raise
+            self._raise_duplicate_serials(vals_list)
+            # Inserted meanwhile by a concurrent transaction
+            raise ValidationError("A device with the same serial number already exists in inventory.") from None
+
+    def write(self, vals):
+        try:
+            with self.env.cr.savepoint():
+                res = super().write(vals)
+                self.flush_recordset()
+        except UniqueViolation as e:
+            if e.diag.constraint_name != SERIAL_INDEX:
+                raise
+            serials = self._get_conflicting_serials(vals)
+            if not serials:
+                raise ValidationError("A device with the same serial number already exists in inventory.") from None
+            raise ValidationError(
+                "A device with serial number %s already exists in inventory." %
+                ", ".join(f"'{serial}'" for serial in serials)
+            ) from None
+        return res
+
+    def _get_conflicting_serials(self, vals):
+        # Serials the write would duplicate, among the other active items or within the records themselves
+        fields_ = ['serial_number', 'brand_id', 'model_id', 'model_variant']
+        keys = []
+        for record in self.with_context(active_test=False).read(fields_ + ['active']):
+            values = {name: vals.get(name, record[name]) for name in fields_ + ['active']}
+            if not values['active']:
+                continue
+            keys.append((
+                values['serial_number'] or '',
+                (values['brand_id'][0] if isinstance(values['brand_id'], tuple) else values['brand_id']) or 0,
+                (values['model_id'][0] if isinstance(values['model_id'], tuple) else values['model_id']) or 0,
+                values['model_variant'] or '',
+            ))
+        existing = self._get_existing_serial_keys(keys, exclude_ids=self.ids)
+        repeated = {key for key in keys if keys.count(key) > 1}
+        return sorted({key[0] for key in existing | repeated})
+
+    @api.model
+    def _find_duplicate_serials(self, vals_list):
+        # Checks a whole batch of new items (e.g. an import file) against the file itself and the
+        # active inventory, with a single query. Returns one readable message per duplicate.
+        Model = self.env['tech.repair.device.model']
+        models_by_id = {m.id: m for m in Model.browse({vals.get('model_id') for vals in vals_list if vals.get('model_id')})}
+
+        keys = []
+        lines_by_key = {}
+        for line, vals in enumerate(vals_list, start=1):
+            # Rows already rejected (no serial or unknown model) keep their line number but are not checked
+            if not vals.get('serial_number') or not vals.get('model_id'):
+                continue
+            key = (vals.get('serial_number') or '', vals.get('brand_id') or 0, vals.get('model_id') or 0, vals.get('model_variant') or '')
+            keys.append(key)
+            lines_by_key.setdefault(key, []).append(line)
+
+        existing = self._get_existing_serial_keys(keys)
+
+        def describe(key):
+            serial, _brand_id, model_id, variant = key
+            model = models_by_id.get(model_id)
+            device = ' '.join(part for part in [model and model.brand_id.name, model and model.name, variant] if part)
+            return f"'{serial}' ({device})" if device else f"'{serial}'"
+
+        messages = []
+        for key, lines in lines_by_key.items():
+            if key in existing:
+                messages.append(f"Line {', '.join(map(str, lines))}: serial number {describe(key)} already exists in inventory.")
+            elif len(lines) > 1:
+                messages.append(f"Lines {', '.join(map(str, lines))}: serial number {describe(key)} is repeated in the file.")
+        return messages
+
+    @api.model
+    def _get_existing_serial_keys(self, keys, exclude_ids=()):
+        # (serial_number, brand_id, model_id, model_variant) keys already used by active items
+        if not keys:
+            return set()
+        self.env.cr.execute(f"""
+            SELECT DISTINCT i.serial_number, i.brand_id, i.model_id, COALESCE(i.model_variant, '')
+              FROM {self._table} i
+              JOIN unnest(%s::varchar[], %s::int[], %s::int[], %s::varchar[])
+                   AS v(serial_number, brand_id, model_id, model_variant)
+                ON i.serial_number = v.serial_number
+               AND i.brand_id = v.brand_id
+               AND i.model_id = v.model_id
+               AND COALESCE(i.model_variant, '') = v.model_variant
+             WHERE i.active
+               AND i.id != ALL(%s::int[])
+        """, [list(column) for column in zip(*keys)] + [list(exclude_ids)])
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _raise_duplicate_serials(self, vals_list):
+        messages = self._find_duplicate_serials(vals_list)
+        if messages:
+            raise ValidationError("\n".join(messages))
+
+    @api.model
+    def check_in_serials(self, model_id, serials, model_variant=False, notes=False, batch_size=2000):
+        """ Bulk check-in of scanned serial numbers for one device configuration.
+
+        Returns one result per scanned line, in order:
+        {'serial_number', 'status': 'created' | 'duplicate' | 'invalid', 'id', 'message'}
+        """
+        model = self.env['tech.repair.device.model'].browse(model_id).exists()
+        if not model:
+            raise ValidationError("Model is required.")
+        if not model.brand_id:
+            raise ValidationError("Brand is required.")
+        model_variant = (model_variant or '').strip() or False
+
+        results = []
+        seen = set()
+        pending = []
+        for serial in serials:
+            serial = (serial or '').strip()
+            result = {'serial_number': serial, 'status': 'created', 'id': False, 'message': False}
+            if not serial:
+                result.update(status='invalid', message="Empty serial number.")
+            elif serial in seen:
+                result.update(status='duplicate', message="Scanned twice.")
+            else:
+                seen.add(serial)
+                pending.append(result)
+            results.append(result)
+
+        # Name, defaults and related fields are resolved once for the whole batch
+        name_prefix = (model.category_id.name, model.brand_id.name, model.name, model_variant)
+        common_vals = {
+            'brand_id': model.brand_id.id,
+            'model_id': model.id,
+            'model_variant': model_variant,
+            'notes': notes or False,
+            'status': 'available',
+            'active': True,
+            'check_in_date': fields.Datetime.now(),
+            'checked_in_by': self.env.uid,
+        }
+        for start in range(0, len(pending), max(batch_size, 1)):
+            self._check_in_batch(pending[start:start + batch_size], model, name_prefix, common_vals)
+        return results
+
+    def _check_in_batch(self, batch, model, name_prefix, common_vals, retry=True):
+        existing = self._get_existing_serials(model, common_vals['model_variant'], [result['serial_number'] for result in batch])
+        for result in batch:
+            if result['serial_number'] in existing:
+                result.update(status='duplicate', message="Already in inventory.")
+        batch = [result for result in batch if result['status'] == 'created']
+        if not batch:
+            return
+
+        vals_list = [
+            dict(common_vals, serial_number=result['serial_number'], name=self._format_name(*name_prefix, result['serial_number']))
+            for result in batch
+        ]
+        try:
+            records = self.create(vals_list)
+        except ValidationError:
+            if not retry:
+                raise
+            # Serials checked in concurrently by another scanner: check the batch again
+            self._check_in_batch(batch, model, name_prefix, common_vals, retry=False)
+            return
+        for result, record in zip(batch, records):
+            result['id'] = record.id
+
+    def _get_existing_serials(self, model, model_variant, serials):
+        self.env.cr.execute(f"""
+            SELECT serial_number FROM {self._table}
+             WHERE active
+               AND model_id = %s
+               AND brand_id = %s
+               AND COALESCE(model_variant, '') = %s
+               AND serial_number = ANY(%s)
+        """, [model.id, model.brand_id.id, model_variant or '', serials])
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _benchmark_check_in(self, count=10000, model_id=None):
+        # Measures check_in_serials throughput (target: more than 1,000 serials per second).
+        # Everything is rolled back; run it from an odoo shell on a copy of the database.
+        model = self.env['tech.repair.device.model'].browse(model_id) if model_id else \
+            self.env['tech.repair.device.model'].search([('brand_id', '!=', False)], limit=1)
+        serials = [f"BENCH-{time.time_ns()}-{index:07d}" for index in range(count)]
+        with self.env.cr.savepoint(flush=False) as savepoint:
+            started = time.perf_counter()
+            results = self.check_in_serials(model.id, serials)
+            self.env.flush_all()
+            elapsed = time.perf_counter() - started
+            savepoint.rollback()
+        self.env.invalidate_all()
+        stats = {
+            'count': count,
+            'created': sum(1 for result in results if result['status'] == 'created'),
+            'seconds': round(elapsed, 3),
+            'serials_per_second': round(count / elapsed) if elapsed else 0,
+        }
+        _logger.info("Inventory check-in benchmark: %s", stats)
+        return stats
+
+    @api.model
+    def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
+        # The picker searches the serial number, the model and the brand (trigram indexes) instead of
+        # the computed name, which has no index and would need a sequential scan on every keystroke
+        if name and operator in ('ilike', 'like', '=ilike', '=like', '='):
             domain = [
-                ('serial_number', '=', record.serial_number),
-                ('category_id', '=', record.category_id.id),
-                ('brand_id', '=', record.brand_id.id),
-                ('model_id', '=', record.model_id.id),
-                ('model_variant', '=', record.model_variant),
-                ('id', '!=', record.id),
-                ('active', '=', True)
+                '|', '|',
+                ('serial_number', operator, name),
+                ('model_id.name', operator, name),
+                ('brand_id.name', operator, name),
+            ] + list(domain or [])
+            return self._search(domain, limit=limit, order=order)
+        return super()._name_search(name, domain, operator, limit, order)
+
+    @api.model
+    def _benchmark_serial_lookup(self, rows=500000, lookups=200):
+        # Measures the serial picker on a large inventory: generates ``rows`` available items
+        # on one model with SQL, then times name_search with the picker domain.
+        # Everything is rolled back; run it from an odoo shell on a copy of the database.
+        model = self.env['tech.repair.device.model'].search([('brand_id', '!=', False)], limit=1)
+        with self.env.cr.savepoint(flush=False) as savepoint:
+            self.env.cr.execute(f"""
+                INSERT INTO {self._table}
+                       (name, serial_number, category_id, brand_id, model_id, status, active, check_in_date, create_date, write_date)
+                SELECT 'Benchmark ' || n, 'BENCH' || lpad(n::text, 9, '0'), %s, %s, %s,
+                       CASE WHEN n %% 10 = 0 THEN 'available' ELSE 'returned' END, true, now(), now(), now()
+                  FROM generate_series(1, %s) n
+            """, [model.category_id.id, model.brand_id.id, model.id, rows])
+            self.env.cr.execute(f"ANALYZE {self._table}")
+
+            picker_domain = [
+                ('category_id', '=', model.category_id.id), ('brand_id', '=', model.brand_id.id),
+                ('model_id', '=', model.id), ('model_variant', '=', False), ('status', '=', 'available'),
             ]
-            if self.search_count(domain) > 0:
-                raise ValidationError(
-                    f"A device with serial number '{record.serial_number}' for "
-                    f"{record.category_id.name} {record.brand_id.name} {record.model_id.name} "
-                    f"{record.model_variant or ''} already exists in inventory."
-                )
+            started = time.perf_counter()
+            for index in range(lookups):
+                self.name_search(f"BENCH{index * 7919 % rows:09d}"[:-3], picker_domain, limit=8)
+            elapsed = time.perf_counter() - started
+
+            query = self._search([('serial_number', 'ilike', 'BENCH00012')] + picker_domain, limit=8)
+            self.env.cr.execute(SQL("EXPLAIN %s", query.select()))
+            plan = "\n".join(row[0] for row in self.env.cr.fetchall())
+            savepoint.rollback()
+        self.env.invalidate_all()
+        stats = {
+            'rows': rows,
+            'lookups': lookups,
+            'ms_per_lookup': round(1000 * elapsed / lookups, 2),
+            'plan': plan,
+        }
+        _logger.info("Inventory serial lookup benchmark: %s", stats)
+        return stats
 
     @api.constrains('brand_id', 'model_id')
     def _check_brand_and_model_required(self):
@@ -90,15 +386,10 @@ class RepairInventory(models.Model):
 
     @api.onchange('brand_id')
     def _onchange_brand_id(self):
-        self.model_id = False
-        domain = {'model_id': [('brand_id', '=', self.brand_id.id)]} if self.brand_id else {'model_id': []}
-        return {'domain': domain}
+        if self.model_id.brand_id != self.brand_id:
+            self.model_id = False
 
     @api.onchange('model_id')
     def _onchange_model_id(self):
         if self.model_id:
             self.brand_id = self.model_id.brand_id
-            # Show only models that match the brand
-            if self.model_id.brand_id:
-                return {'domain': {'model_id': [('brand_id', '=', self.model_id.brand_id.id)]}}
-        return {'domain': {'model_id': []}}
\ No newline at end of file
@@ -0,0 +1,80 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+# Scan-driven check-in: the barcode reader types one serial per line, then everything is created in bulk
+class RepairInventoryCheckin(models.TransientModel):
+    _name = 'tech.repair.inventory.checkin'
+    _description = 'Inventory Bulk Check-in'
+
+    brand_id = fields.Many2one('tech.repair.device.brand', string='Brand')
+    model_id = fields.Many2one('tech.repair.device.model', string='Model', required=True, domain="[('brand_id', '=?', brand_id)]")
+    category_id = fields.Many2one(related='model_id.category_id', string='Category')
+    model_variant = fields.Char(string='Variant', help="e.g. 14x4.3")
+    notes = fields.Text(string='Notes')
+    serials = fields.Text(string='Scanned Serials', help="One serial number per line")
+    scanned_count = fields.Integer(string='Scanned', compute='_compute_scanned_count')
+
+    state = fields.Selection([('scan', 'Scan'), ('done', 'Done')], default='scan')
+    created_count = fields.Integer(string='Checked In', readonly=True)
+    skipped_count = fields.Integer(string='Skipped', readonly=True)
+    result = fields.Text(string='Skipped Serials', readonly=True)
+    inventory_ids = fields.Many2many('tech.repair.inventory', string='Checked In Items', readonly=True)
+
+    @api.depends('serials')
+    def _compute_scanned_count(self):
+        for wizard in self:
+            wizard.scanned_count = len(wizard._get_serials())
+
+    @api.onchange('model_id')
+    def _onchange_model_id(self):
+        if self.model_id:
+            self.brand_id = self.model_id.brand_id
+
+    def _get_serials(self):
+        return [line.strip() for line in (self.serials or '').splitlines() if line.strip()]
+
+    def action_check_in(self):
+        self.ensure_one()
+        serials = self._get_serials()
+        if not serials:
+            raise UserError("Scan at least one serial number.")
+
+        results = self.env['tech.repair.inventory'].check_in_serials(self.model_id.id, serials, self.model_variant, self.notes)
+        created = [result['id'] for result in results if result['status'] == 'created']
+        skipped = [result for result in results if result['status'] != 'created']
+        self.write({
+            'state': 'done',
+            'created_count': len(created),
+            'skipped_count': len(skipped),
+            'result': "\n".join(f"{result['serial_number'] or '-'}: {result['message']}" for result in skipped),
+            'inventory_ids': [(6, 0, created)],
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_scan_more(self):
+        # Same device configuration, new pallet
+        self.ensure_one()
+        self.write({'state': 'scan', 'serials': False, 'result': False, 'created_count': 0, 'skipped_count': 0, 'inventory_ids': [(5,)]})
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_open_items(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Checked In Devices',
+            'res_model': 'tech.repair.inventory',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.inventory_ids.ids)],
+        }
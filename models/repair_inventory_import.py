@@ -0,0 +1,76 @@
+import base64
+import csv
+import io
+from odoo import models, fields
+from odoo.exceptions import UserError
+
+# Bulk import of inventory serials from a CSV file, validated as a whole before creating anything
+class RepairInventoryImport(models.TransientModel):
+    _name = 'tech.repair.inventory.import'
+    _description = 'Inventory Serial Import'
+
+    file = fields.Binary(string='CSV File', required=True, help="Columns: serial_number, brand, model, variant (optional), notes (optional)")
+    filename = fields.Char(string='File Name')
+    delimiter = fields.Char(string='Delimiter', default=',', required=True)
+    imported_count = fields.Integer(string='Imported Items', readonly=True)
+
+    def _read_rows(self):
+        self.ensure_one()
+        content = base64.b64decode(self.file).decode('utf-8-sig')
+        reader = csv.DictReader(io.StringIO(content), delimiter=self.delimiter)
+        missing = {'serial_number', 'brand', 'model'} - set(reader.fieldnames or [])
+        if missing:
+            raise UserError(f"Missing columns in the file: {', '.join(sorted(missing))}")
+        return [{key: (value or '').strip() for key, value in row.items() if key} for row in reader]
+
+    def _prepare_vals_list(self, rows):
+        # Brands and models are resolved by name with one query each
+        brands = self.env['tech.repair.device.brand'].search_read([('name', 'in', list({row['brand'] for row in rows}))], ['name'])
+        brand_ids = {brand['name']: brand['id'] for brand in brands}
+        models_ = self.env['tech.repair.device.model'].search_read([
+            ('name', 'in', list({row['model'] for row in rows})),
+            ('brand_id', 'in', list(brand_ids.values())),
+        ], ['name', 'brand_id'])
+        model_ids = {(model['brand_id'][0], model['name']): model['id'] for model in models_}
+
+        vals_list, errors = [], []
+        for line, row in enumerate(rows, start=1):
+            brand_id = brand_ids.get(row['brand'])
+            model_id = model_ids.get((brand_id, row['model']))
+            if not row['serial_number']:
+                errors.append(f"Line {line}: serial number is missing.")
+            elif not brand_id:
+                errors.append(f"Line {line}: unknown brand '{row['brand']}'.")
+            elif not model_id:
+                errors.append(f"Line {line}: unknown model '{row['model']}' for brand '{row['brand']}'.")
+            vals_list.append({
+                'serial_number': row['serial_number'],
+                'brand_id': brand_id,
+                'model_id': model_id,
+                'model_variant': row.get('variant') or False,
+                'notes': row.get('notes') or False,
+            })
+        return vals_list, errors
+
+    def action_import(self):
+        self.ensure_one()
+        rows = self._read_rows()
+        if not rows:
+            raise UserError("The file is empty.")
+
+        vals_list, errors = self._prepare_vals_list(rows)
+        Inventory = self.env['tech.repair.inventory']
+        # Every duplicate of the file is reported at once, checked with a single query
+        errors += Inventory._find_duplicate_serials(vals_list)
+        if errors:
+            raise UserError("Nothing was imported:\n" + "\n".join(errors))
+
+        items = Inventory.create(vals_list)
+        self.imported_count = len(items)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Imported Devices',
+            'res_model': 'tech.repair.inventory',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', items.ids)],
+        }
@@ -2,7 +2,9 @@ from odoo import models, fields
 
 class RepairLoanerDevice(models.Model):
     _name = 'tech.repair.loaner_device'
+    _inherit = ['tech.repair.reservation.mixin']
     _description = 'Loaner Devices'
+    _reservation_order_field = 'tech_repair_order_id'
 
     name = fields.Char(string='Device Name', required=True)
     serial_number = fields.Char(string='Serial / IMEI', required=True)
@@ -0,0 +1,61 @@
+from odoo import models, fields, tools
+
+# Revenue and margin analysis of the repairs (SQL view over the stored per-order amounts)
+class RepairMarginReport(models.Model):
+    _name = 'tech.repair.margin.report'
+    _description = 'Repair Revenue and Margin Analysis'
+    _auto = False
+    _order = 'date desc'
+
+    repair_order_id = fields.Many2one('tech.repair.order', string='Repair', readonly=True)
+    date = fields.Datetime(string='Opening Date', readonly=True)
+    close_date = fields.Datetime(string='Closing Date', readonly=True)
+    customer_id = fields.Many2one('res.partner', string='Customer', readonly=True)
+    assigned_to = fields.Many2one('res.users', string='Technician', readonly=True)
+    worktype = fields.Many2one('tech.repair.worktype', string='Work Type', readonly=True)
+    state_id = fields.Many2one('tech.repair.state', string='Status', readonly=True)
+    # Legacy order fields, or the first device line of the order
+    category_id = fields.Many2one('tech.repair.device.category', string='Category', readonly=True)
+    brand_id = fields.Many2one('tech.repair.device.brand', string='Brand', readonly=True)
+    model_id = fields.Many2one('tech.repair.device.model', string='Model', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+
+    revenue_amount = fields.Monetary(string='Revenue €', readonly=True)
+    cost_amount = fields.Monetary(string='Cost €', readonly=True)
+    margin_amount = fields.Monetary(string='Margin €', readonly=True)
+    order_count = fields.Integer(string='# Repairs', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT o.id AS id,
+                       o.id AS repair_order_id,
+                       o.open_date AS date,
+                       o.close_date AS close_date,
+                       o.customer_id AS customer_id,
+                       o.assigned_to AS assigned_to,
+                       o.worktype AS worktype,
+                       o.state_id AS state_id,
+                       COALESCE(o.category_id, d.category_id) AS category_id,
+                       COALESCE(o.brand_id, d.brand_id) AS brand_id,
+                       COALESCE(o.model_id, d.model_id) AS model_id,
+                       o.company_id AS company_id,
+                       c.currency_id AS currency_id,
+                       COALESCE(o.revenue_amount, 0) AS revenue_amount,
+                       COALESCE(o.cost_amount, 0) AS cost_amount,
+                       COALESCE(o.margin_amount, 0) AS margin_amount,
+                       1 AS order_count
+                  FROM tech_repair_order o
+                  JOIN res_company c ON c.id = o.company_id
+             LEFT JOIN LATERAL (
+                        SELECT category_id, brand_id, model_id
+                          FROM tech_repair_order_device
+                         WHERE repair_order_id = o.id
+                      ORDER BY sequence, id
+                         LIMIT 1
+                       ) d ON TRUE
+                 WHERE o.active
+            )
+        """)
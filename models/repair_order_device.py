@@ -7,7 +7,7 @@ class RepairOrderDevice(models.Model):
     _order = 'sequence, id'
 
     sequence = fields.Integer(string='Sequence', default=10)
-    repair_order_id = fields.Many2one('tech.repair.order', string='Repair Order', required=True, ondelete='cascade')
+    repair_order_id = fields.Many2one('tech.repair.order', string='Repair Order', required=True, ondelete='cascade', index=True)
     
     # Device configuration
     category_id = fields.Many2one('tech.repair.device.category', string='Category', required=True)
@@ -90,45 +90,48 @@ class RepairOrderDevice(models.Model):
     def create(self, vals_list):
         """Update inventory status when device line is created"""
         lines = super().create(vals_list)
-        for line in lines:
-            if line.inventory_id:
-                line.inventory_id.write({
-                    'status': 'in_repair',
-                    'repair_order_id': line.repair_order_id.id
-                })
+        lines._sync_inventory_status(assigned=lines)
         return lines
 
     def write(self, vals):
         """Update inventory status when device line is modified"""
-        # Handle inventory changes
-        if 'inventory_id' in vals:
-            # Release old inventory
-            for line in self:
-                if line.inventory_id and line.inventory_id.id != vals.get('inventory_id'):
-                    line.inventory_id.write({
-                        'status': 'available',
-                        'repair_order_id': False
-                    })
-            
+        if 'inventory_id' not in vals and 'repair_order_id' not in vals:
+            return super().write(vals)
+
+        # Release old inventory, assign new inventory: both in one pass after the write
+        released = self.inventory_id
         result = super().write(vals)
-        
-        # Assign new inventory
-        if 'inventory_id' in vals:
-            for line in self:
-                if line.inventory_id:
-                    line.inventory_id.write({
-                        'status': 'in_repair',
-                        'repair_order_id': line.repair_order_id.id
-                    })
-        
+        self._sync_inventory_status(released=released, assigned=self)
         return result
 
     def unlink(self):
         """Release inventory when device line is deleted"""
-        for line in self:
+        released = self.inventory_id
+        result = super().unlink()
+        self.env['tech.repair.order.device']._sync_inventory_status(released=released)
+        return result
+
+    @api.model
+    def _sync_inventory_status(self, released=None, assigned=None):
+        """Set the status of the inventory items of the given lines with one write per target.
+
+        Items of ``assigned`` lines are reserved (row-locked) for the order of their line,
+        released items go back to available. An item both released and assigned in the same
+        operation, or still used by another line (swapped between two lines) stays in repair.
+        """
+        Inventory = self.env['tech.repair.inventory']
+        released = (released or Inventory).exists()
+        items_by_order = {}
+        for line in (assigned or self.env['tech.repair.order.device']):
             if line.inventory_id:
-                line.inventory_id.write({
-                    'status': 'available',
-                    'repair_order_id': False
-                })
-        return super().unlink()
+                items_by_order.setdefault(line.repair_order_id, Inventory)
+                items_by_order[line.repair_order_id] |= line.inventory_id
+
+        reassigned = Inventory.union(*items_by_order.values())
+        to_release = released - reassigned
+        if to_release:
+            # Items swapped line by line (one write per line) are still held by another line
+            to_release -= self.env['tech.repair.order.device'].search([('inventory_id', 'in', to_release.ids)]).inventory_id
+        to_release._release()
+        for order, items in items_by_order.items():
+            items._reserve(order, reassigned=released & reassigned)
@@ -0,0 +1,180 @@
+import functools
+import logging
+import threading
+import time
+from odoo import models, fields, api, tools
+from odoo.http import request
+from odoo.tools.profiler import Profiler
+
+_logger = logging.getLogger(__name__)
+
+# Opt-in switches (ir.config_parameter)
+PERF_ENABLED_PARAM = 'tech_repair_management.perf_enabled'
+# Also record the SQL queries of every sample (expensive: only while investigating)
+PERF_QUERIES_PARAM = 'tech_repair_management.perf_capture_queries'
+PERF_RETENTION_PARAM = 'tech_repair_management.perf_retention_days'
+
+
+def instrumented(endpoint):
+    """ Records query count, SQL time, Python time and chatter messages of every call of the
+    decorated model method or controller route, when PERF_ENABLED_PARAM is set.
+    Nested instrumented calls are recorded too, each with its own figures. """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            env = self.env if isinstance(self, models.BaseModel) else request.env
+            params = env['ir.config_parameter'].sudo()
+            if not tools.str2bool(params.get_param(PERF_ENABLED_PARAM, 'False')):
+                return method(self, *args, **kwargs)
+
+            thread = threading.current_thread()
+            for counter in ('query_count', 'query_time', 'tech_repair_messages'):
+                if not hasattr(thread, counter):
+                    setattr(thread, counter, 0)
+            # Queries are listed by the outermost instrumented call only
+            capture = tools.str2bool(params.get_param(PERF_QUERIES_PARAM, 'False')) and not getattr(thread, 'tech_repair_profiling', False)
+
+            query_count, query_time, messages = thread.query_count, thread.query_time, thread.tech_repair_messages
+            started = time.perf_counter()
+            profiler = None
+            if capture:
+                thread.tech_repair_profiling = True
+                profiler = Profiler(collectors=['sql'], db=None, description=endpoint)
+                profiler.__enter__()
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                if profiler:
+                    profiler.__exit__(None, None, None)
+                    thread.tech_repair_profiling = False
+            duration = time.perf_counter() - started
+            sql_time = thread.query_time - query_time
+
+            queries = False
+            if profiler:
+                queries = "\n\n".join(
+                    f"-- {entry['time'] * 1000:.2f} ms\n{entry['full_query']}" for entry in profiler.collectors[0].entries
+                )
+            try:
+                # A failed INSERT must not abort the transaction of the measured request
+                with env.cr.savepoint(flush=False):
+                    env['tech.repair.perf.sample'].sudo()._record(
+                        endpoint=endpoint,
+                        duration_ms=duration * 1000,
+                        sql_count=thread.query_count - query_count,
+                        sql_ms=sql_time * 1000,
+                        python_ms=(duration - sql_time) * 1000,
+                        messages=thread.tech_repair_messages - messages,
+                        queries=queries,
+                    )
+            except Exception:
+                _logger.exception("Performance sample of %s not recorded", endpoint)
+            return result
+        return wrapper
+    return decorator
+
+
+# One measured call
+class RepairPerfSample(models.Model):
+    _name = 'tech.repair.perf.sample'
+    _description = 'Repair Performance Sample'
+    _order = 'duration_ms desc'
+
+    endpoint = fields.Char(string='Endpoint', required=True, index=True, readonly=True)
+    duration_ms = fields.Float(string='Total (ms)', readonly=True)
+    sql_count = fields.Integer(string='Queries', readonly=True)
+    sql_ms = fields.Float(string='SQL (ms)', readonly=True)
+    python_ms = fields.Float(string='Python (ms)', readonly=True)
+    messages = fields.Integer(string='Chatter Messages', readonly=True)
+    queries = fields.Text(string='Queries', readonly=True)
+    create_date = fields.Datetime(string='Date', readonly=True, index=True)
+
+    @api.model
+    def _record(self, **values):
+        # Plain INSERT: the ORM would flush and recompute in the middle of the measured request
+        values = {key: value for key, value in values.items() if value is not False}
+        columns = list(values)
+        self.env.cr.execute(
+            f"INSERT INTO {self._table} ({', '.join(columns)}, create_uid, create_date, write_uid, write_date) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}, %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC')",
+            [values[column] for column in columns] + [self.env.uid, self.env.uid],
+        )
+
+    @api.model
+    def _dump_slowest(self, endpoint=None, limit=20):
+        # Slowest samples with their queries, e.g. from an odoo shell
+        domain = [('endpoint', '=', endpoint)] if endpoint else []
+        return self.search_read(domain, ['endpoint', 'create_date', 'duration_ms', 'sql_count', 'sql_ms', 'python_ms', 'messages', 'queries'], limit=limit)
+
+    # Rolling window: samples older than the retention are deleted (cron)
+    @api.model
+    def _cron_gc_samples(self):
+        days = int(self.env['ir.config_parameter'].sudo().get_param(PERF_RETENTION_PARAM, 7))
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE create_date < (now() AT TIME ZONE 'UTC') - make_interval(days => %s)", [days])
+
+
+# Percentiles per endpoint over the retained samples (SQL view)
+class RepairPerfStat(models.Model):
+    _name = 'tech.repair.perf.stat'
+    _description = 'Repair Performance Statistics'
+    _auto = False
+    _order = 'p95_ms desc'
+
+    endpoint = fields.Char(string='Endpoint', readonly=True)
+    sample_count = fields.Integer(string='Calls', readonly=True)
+    avg_ms = fields.Float(string='Average (ms)', readonly=True)
+    p50_ms = fields.Float(string='p50 (ms)', readonly=True, aggregator='max')
+    p95_ms = fields.Float(string='p95 (ms)', readonly=True, aggregator='max')
+    p99_ms = fields.Float(string='p99 (ms)', readonly=True, aggregator='max')
+    max_ms = fields.Float(string='Max (ms)', readonly=True, aggregator='max')
+    avg_sql_count = fields.Float(string='Queries (avg)', readonly=True, aggregator='avg')
+    p95_sql_count = fields.Float(string='Queries (p95)', readonly=True, aggregator='max')
+    avg_sql_ms = fields.Float(string='SQL (avg ms)', readonly=True, aggregator='avg')
+    avg_python_ms = fields.Float(string='Python (avg ms)', readonly=True, aggregator='avg')
+    avg_messages = fields.Float(string='Chatter Messages (avg)', readonly=True, aggregator='avg')
+    last_date = fields.Datetime(string='Last Call', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT row_number() OVER (ORDER BY s.endpoint) AS id,
+                       s.endpoint AS endpoint,
+                       count(*) AS sample_count,
+                       avg(s.duration_ms) AS avg_ms,
+                       percentile_cont(0.50) WITHIN GROUP (ORDER BY s.duration_ms) AS p50_ms,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.duration_ms) AS p95_ms,
+                       percentile_cont(0.99) WITHIN GROUP (ORDER BY s.duration_ms) AS p99_ms,
+                       max(s.duration_ms) AS max_ms,
+                       avg(s.sql_count) AS avg_sql_count,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.sql_count) AS p95_sql_count,
+                       avg(s.sql_ms) AS avg_sql_ms,
+                       avg(s.python_ms) AS avg_python_ms,
+                       avg(s.messages) AS avg_messages,
+                       max(s.create_date) AS last_date
+                  FROM tech_repair_perf_sample s
+              GROUP BY s.endpoint
+            )
+        """)
+
+    def action_view_slowest(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f"Slowest calls: {self.endpoint}",
+            'res_model': 'tech.repair.perf.sample',
+            'view_mode': 'list,form',
+            'domain': [('endpoint', '=', self.endpoint)],
+        }
+
+
+class MailMessage(models.Model):
+    _inherit = 'mail.message'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Chatter messages posted during an instrumented call
+        thread = threading.current_thread()
+        if hasattr(thread, 'tech_repair_messages'):
+            thread.tech_repair_messages += len(vals_list)
+        return super().create(vals_list)
@@ -0,0 +1,70 @@
+import base64
+import hashlib
+import logging
+import qrcode
+from io import BytesIO
+from psycopg2 import IntegrityError
+from odoo import models, fields, api
+
+# Content-addressed cache of the QR code images, keyed by the encoded URL
+class RepairQrCode(models.Model):
+    _name = 'tech.repair.qr.code'
+    _description = 'QR Code Image Cache'
+    _logger = logging.getLogger(__name__)
+
+    url_hash = fields.Char(string='URL Hash', required=True, index=True, readonly=True)
+    url = fields.Char(string='Encoded URL', required=True, readonly=True)
+    image = fields.Binary(string='QR Code', attachment=False, readonly=True)
+
+    _sql_constraints = [
+        ('url_hash_unique', 'unique(url_hash)', 'A QR code already exists for this URL.'),
+    ]
+
+    @api.model
+    def _hash_url(self, url):
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    @api.model
+    def _get_images(self, urls):
+        # Returns {url: base64 PNG}. Missing images are rendered and stored with one create,
+        # so every URL is rendered only once whatever the number of orders or workers.
+        # The base URL is part of the key: changing web.base.url simply addresses new images.
+        hashes = {self._hash_url(url): url for url in set(urls) if url}
+        if not hashes:
+            return {}
+
+        cached = self.sudo().search_read([('url_hash', 'in', list(hashes))], ['url_hash', 'image'])
+        images = {hashes[rec['url_hash']]: rec['image'] for rec in cached}
+
+        missing = [(url_hash, url) for url_hash, url in hashes.items() if url not in images]
+        if missing:
+            vals_list = [{'url_hash': url_hash, 'url': url, 'image': self._render_png(url)} for url_hash, url in missing]
+            try:
+                with self.env.cr.savepoint():
+                    self.sudo().create(vals_list)
+            except IntegrityError:
+                # Another worker stored some of them in the meantime: the images are identical
+                self._logger.info("QR codes generated concurrently, using the stored ones")
+            images.update({vals['url']: vals['image'] for vals in vals_list})
+        return images
+
+    @api.model
+    def _get_image(self, url):
+        return self._get_images([url]).get(url, False)
+
+    # Genera un QR Code per un URL dato
+    @api.model
+    def _render_png(self, url):
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+
+        img = qr.make_image(fill='black', back_color='white')
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        return base64.b64encode(buffer.getvalue())
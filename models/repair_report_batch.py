@@ -0,0 +1,146 @@
+import base64
+import logging
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools.pdf import merge_pdf
+
+# Batch printing of the repair reports of many orders, rendered in chunks by a cron
+class RepairReportBatch(models.Model):
+    _name = 'tech.repair.report.batch'
+    _description = 'Repair Report Batch Print'
+    _order = 'id desc'
+    _logger = logging.getLogger(__name__)
+
+    name = fields.Char(string='Name', required=True, default=lambda self: f"Batch print {fields.Datetime.now():%d/%m/%Y %H:%M}")
+    report_ref = fields.Selection([
+        ('tech_repair_management.action_report_repair_order', 'Repair Report'),
+        ('tech_repair_management.action_report_repair_order_two_copies', 'Repair Report (internal copy)'),
+    ], string='Report', required=True, default='tech_repair_management.action_report_repair_order')
+    repair_order_ids = fields.Many2many('tech.repair.order', string='Repairs')
+    chunk_size = fields.Integer(string='Orders per Chunk', default=50, help="Orders rendered by each wkhtmltopdf run")
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True)
+    chunk_count = fields.Integer(string='Chunks', readonly=True)
+    chunks_done = fields.Integer(string='Chunks Done', readonly=True)
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+
+    # Rendered chunks, merged into attachment_id at the end
+    chunk_attachment_ids = fields.Many2many('ir.attachment', string='Chunk PDFs', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='PDF', readonly=True, ondelete='set null')
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.depends('chunk_count', 'chunks_done')
+    def _compute_progress(self):
+        for batch in self:
+            batch.progress = 100.0 * batch.chunks_done / batch.chunk_count if batch.chunk_count else 0.0
+
+    def _get_chunks(self):
+        # Orders of the batch in print order, split by chunk_size
+        self.ensure_one()
+        orders = self.repair_order_ids.sorted('name')
+        size = max(self.chunk_size, 1)
+        return [orders[start:start + size] for start in range(0, len(orders), size)]
+
+    def action_start(self):
+        for batch in self:
+            if not batch.repair_order_ids:
+                raise UserError("Select at least one repair to print.")
+            batch.chunk_attachment_ids.unlink()
+            batch.write({
+                'state': 'running',
+                'chunk_count': len(batch._get_chunks()),
+                'chunks_done': 0,
+                'error': False,
+            })
+        self.env.ref('tech_repair_management.ir_cron_process_report_batches')._trigger()
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError("The PDF is not ready yet.")
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f"/web/content/{self.attachment_id.id}?download=true",
+            'target': 'self',
+        }
+
+    # Rende i chunk dei batch in corso (cron)
+    @api.model
+    def _cron_process_report_batches(self, max_chunks=20):
+        for _i in range(max_chunks):
+            # The batch is locked while one of its chunks is rendered
+            self.env.cr.execute("""
+                SELECT id FROM tech_repair_report_batch
+                 WHERE state = 'running'
+                 ORDER BY id
+                 LIMIT 1
+                 FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            self.browse(row[0])._process_next_chunk()
+            self.env.cr.commit()
+
+    def _process_next_chunk(self):
+        self.ensure_one()
+        chunks = self._get_chunks()
+        try:
+            if self.chunks_done < len(chunks):
+                chunk = chunks[self.chunks_done]
+                # Orders already printed in this revision are taken from the report cache (report_hash)
+                pdf_content, _content_type = self.env['ir.actions.report']._render_qweb_pdf(self.report_ref, chunk.ids)
+                attachment = self._create_pdf_attachment(f"{self.name} - {self.chunks_done + 1}.pdf", pdf_content)
+                self.write({
+                    'chunk_attachment_ids': [(4, attachment.id)],
+                    'chunks_done': self.chunks_done + 1,
+                })
+                self._notify_progress()
+
+            if self.chunks_done >= len(chunks):
+                self._merge_chunks()
+        except Exception as e:
+            self._logger.error("Error in batch print %s: %s", self.name, e)
+            self.env.cr.rollback()
+            self.write({'state': 'failed', 'error': str(e)})
+            self._notify_progress()
+
+    def _merge_chunks(self):
+        chunk_pdfs = [base64.b64decode(attachment.datas) for attachment in self.chunk_attachment_ids.sorted('id')]
+        pdf_content = merge_pdf(chunk_pdfs) if len(chunk_pdfs) > 1 else chunk_pdfs[0]
+        self.attachment_id = self._create_pdf_attachment(f"{self.name}.pdf", pdf_content)
+        self.chunk_attachment_ids.unlink()
+        self.state = 'done'
+        self._notify_progress()
+
+    def _create_pdf_attachment(self, name, pdf_content):
+        return self.env['ir.attachment'].create({
+            'name': name,
+            'type': 'binary',
+            'raw': pdf_content,
+            'mimetype': 'application/pdf',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+
+    def _notify_progress(self):
+        # Progress is pushed on the bus to the user who launched the batch
+        self.ensure_one()
+        self.create_uid._bus_send('tech_repair_report_batch_progress', {
+            'batch_id': self.id,
+            'state': self.state,
+            'chunks_done': self.chunks_done,
+            'chunk_count': self.chunk_count,
+        })
+        if self.state in ('done', 'failed'):
+            self.create_uid._bus_send('simple_notification', {
+                'type': 'success' if self.state == 'done' else 'danger',
+                'title': self.name,
+                'message': "The PDF is ready." if self.state == 'done' else f"Batch print failed: {self.error}",
+                'sticky': False,
+            })
@@ -0,0 +1,134 @@
+import base64
+import logging
+from datetime import timedelta
+from psycopg2 import IntegrityError
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+# Renders tried before a job is marked as failed, spaced by an exponential backoff
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(minutes=1)
+# A failed job is queued again when its report is requested after this delay
+FAILED_RETRY_DELAY = timedelta(hours=1)
+
+# Queue of PDF reports rendered in background (cron) instead of inside the HTTP worker
+class RepairReportJob(models.Model):
+    _name = 'tech.repair.report.job'
+    _description = 'Repair Report Render Queue'
+    _order = 'id'
+    _logger = logging.getLogger(__name__)
+
+    repair_order_id = fields.Many2one('tech.repair.order', string='Repair', required=True, ondelete='cascade', index=True)
+    # XML id of the ir.actions.report to render
+    report_ref = fields.Char(string='Report', required=True)
+    # Hash of the order fields used by the report: a new hash means a new PDF
+    content_hash = fields.Char(string='Content Hash', required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    attachment_id = fields.Many2one('ir.attachment', string='PDF', ondelete='set null')
+    error = fields.Text(string='Error')
+    attempts = fields.Integer(string='Attempts', default=0)
+    retry_after = fields.Datetime(string='Retry After')
+
+    _sql_constraints = [
+        ('job_unique', 'unique(repair_order_id, report_ref, content_hash)', 'This report revision is already queued.'),
+    ]
+
+    @api.model
+    def _get_job(self, repair_order, report_ref):
+        # Returns the job of the current revision of the report, queuing it if needed
+        content_hash = repair_order._get_report_hashes()[repair_order.id]
+        job = self.search([
+            ('repair_order_id', '=', repair_order.id),
+            ('report_ref', '=', report_ref),
+            ('content_hash', '=', content_hash),
+        ], limit=1)
+        if not job:
+            try:
+                with self.env.cr.savepoint():
+                    job = self.create({
+                        'repair_order_id': repair_order.id,
+                        'report_ref': report_ref,
+                        'content_hash': content_hash,
+                    })
+            except IntegrityError:
+                # Queued by a concurrent request
+                return self.search([
+                    ('repair_order_id', '=', repair_order.id),
+                    ('report_ref', '=', report_ref),
+                    ('content_hash', '=', content_hash),
+                ], limit=1)
+        elif job.state == 'failed':
+            if job.write_date > fields.Datetime.now() - FAILED_RETRY_DELAY:
+                return job
+            # Failed a while ago (e.g. wkhtmltopdf was down): try again from scratch
+            job.write({'state': 'pending', 'attempts': 0, 'retry_after': False})
+        elif job.state == 'done' and not job.attachment_id:
+            # The cached PDF has been cleaned up: render it again
+            job.state = 'pending'
+        else:
+            # Rendered, or already queued (the cron was triggered then): the public page polls
+            # this every few seconds and only reads the job
+            return job
+        self.env.ref('tech_repair_management.ir_cron_process_report_jobs')._trigger()
+        return job
+
+    def _get_pdf(self):
+        self.ensure_one()
+        return base64.b64decode(self.attachment_id.datas) if self.state == 'done' and self.attachment_id else False
+
+    # Rende i report in coda (cron)
+    @api.model
+    def _cron_process_report_jobs(self, limit=20):
+        # One job at a time, locked until its commit, so that parallel workers never render the same report twice
+        for _i in range(limit):
+            self.env.cr.execute("""
+                SELECT id FROM tech_repair_report_job
+                 WHERE state = 'pending'
+                   AND (retry_after IS NULL OR retry_after <= now() at time zone 'UTC')
+                 ORDER BY id
+                 LIMIT 1
+                 FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            self.browse(row[0])._render()
+            self.env.cr.commit()
+
+    def _render(self):
+        self.ensure_one()
+        order = self.repair_order_id
+        try:
+            with self.env.cr.savepoint():
+                report = self.env['ir.actions.report']._get_report(self.report_ref)
+                report._render_qweb_pdf(report, [order.id])
+                # Both repair reports store the PDF of each revision as an attachment (see report_hash)
+                attachment = report._retrieve_attachment(order)
+                if not attachment:
+                    raise UserError(f"The report {self.report_ref} did not store its PDF.")
+        except Exception as e:
+            self._logger.error("Error generating PDF for repair %s: %s", order.name, e)
+            attempts = self.attempts + 1
+            if attempts >= MAX_ATTEMPTS:
+                self.write({'state': 'failed', 'error': str(e), 'attempts': attempts, 'retry_after': False})
+                return
+            # Transient errors (e.g. wkhtmltopdf busy) are retried later, 1, 2, 4... minutes apart
+            retry_after = fields.Datetime.now() + RETRY_DELAY * 2 ** (attempts - 1)
+            self.write({'state': 'pending', 'error': str(e), 'attempts': attempts, 'retry_after': retry_after})
+            self.env.ref('tech_repair_management.ir_cron_process_report_jobs')._trigger(at=retry_after)
+            return
+
+        self.write({'state': 'done', 'attachment_id': attachment.id, 'error': False, 'retry_after': False})
+
+        # Older revisions of the same report are no longer reachable
+        stale_jobs = self.search([
+            ('repair_order_id', '=', order.id),
+            ('report_ref', '=', self.report_ref),
+            ('id', '<', self.id),
+        ])
+        stale_jobs.attachment_id.unlink()
+        stale_jobs.unlink()
@@ -0,0 +1,68 @@
+from odoo import models
+from odoo.exceptions import UserError
+
+# Items (inventory devices, loaners) that a repair order takes exclusively
+class RepairReservationMixin(models.AbstractModel):
+    _name = 'tech.repair.reservation.mixin'
+    _description = 'Reservable Item'
+
+    # Many2one to tech.repair.order and status values of the inheriting model
+    _reservation_order_field = 'repair_order_id'
+    _reservation_available_status = 'available'
+    _reservation_assigned_status = 'assigned'
+
+    def _lock_for_reservation(self):
+        # Row locks held until the end of the transaction. SKIP LOCKED fails fast instead of
+        # waiting for the other technician's transaction: the items are being taken right now.
+        if not self:
+            return
+        self.flush_recordset(['status', self._reservation_order_field])
+        self.env.cr.execute(f"""
+            SELECT id FROM {self._table}
+             WHERE id IN %s
+             ORDER BY id
+               FOR UPDATE SKIP LOCKED
+        """, [tuple(self.ids)])
+        locked = {row[0] for row in self.env.cr.fetchall()}
+        busy = self.filtered(lambda item: item.id not in locked)
+        if busy:
+            raise UserError(
+                "%s is being assigned by another user right now. Choose another one." %
+                ", ".join(busy.mapped('display_name'))
+            )
+        # Values read after the lock are the committed ones
+        self.invalidate_recordset(['status', self._reservation_order_field])
+
+    def _reserve(self, order, reassigned=None):
+        """ Assigns the items to ``order`` inside the current transaction.
+
+        Raises if an item is locked by a concurrent transaction or already assigned to another
+        order. Items of ``reassigned`` may be taken from their current order (swap in the same
+        operation).
+        """
+        self._lock_for_reservation()
+        order_field = self._reservation_order_field
+        taken = self.filtered(lambda item:
+            item.status != self._reservation_available_status
+            and item[order_field] != order
+            and item not in (reassigned or self.browse())
+        )
+        if taken:
+            raise UserError(
+                "%s is no longer available: %s" % (
+                    ", ".join(taken.mapped('display_name')),
+                    ", ".join(filter(None, taken.mapped(f'{order_field}.name'))) or "not available",
+                )
+            )
+        to_assign = self.filtered(lambda item: item.status != self._reservation_assigned_status or item[order_field] != order)
+        to_assign.write({
+            'status': self._reservation_assigned_status,
+            order_field: order.id,
+        })
+
+    def _release(self):
+        to_release = self.filtered(lambda item: item.status == self._reservation_assigned_status)
+        to_release.write({
+            'status': self._reservation_available_status,
+            self._reservation_order_field: False,
+        })
@@ -3,7 +3,9 @@ from odoo import models, fields
 # Model for repair states
 class RepairState(models.Model):
     _name = 'tech.repair.state'
+    _inherit = ['tech.repair.config.cache.mixin']
     _description = 'Repair States'
+    _config_cache_fields = ('sequence',)
 
     # State name (e.g. Waiting, In repair, Completed)
     name = fields.Char(string='State Name', required=True)
@@ -2,7 +2,9 @@ from odoo import models, fields, api
 
 class RepairInformativa(models.Model):
     _name = 'tech.repair.term'
+    _inherit = ['tech.repair.config.cache.mixin']
     _description = "Repair Terms"
+    _config_cache_fields = ('predefinita',)
 
     name = fields.Char(string="Title", required=True)
     contenuto = fields.Html(string="Terms Text", required=True)
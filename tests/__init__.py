@@ -0,0 +1,11 @@
+from . import test_benchmark
+from . import test_chat
+from . import test_config
+from . import test_inventory
+from . import test_numbering
+from . import test_order_device
+from . import test_renewal
+from . import test_reservation
+from . import test_scan
+from . import test_status_page_load
+from . import test_tracking
@@ -0,0 +1,41 @@
+from odoo.tests import TransactionCase
+
+
+class TechRepairCommon(TransactionCase):
+    """ Minimal catalog and configuration shared by the repair tests. """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = cls.env
+        cls.customer = env['res.partner'].create({'name': "Test Customer", 'email': "customer@example.com"})
+        cls.worktype = env['tech.repair.worktype'].create({'name': "Test Work", 'price': 50.0})
+        cls.state_open, cls.state_closed = env['tech.repair.state'].create([
+            {'name': "Test Open", 'sequence': 1},
+            {'name': "Test Closed", 'sequence': 99, 'is_closed': True},
+        ])
+        cls.category = env['tech.repair.device.category'].create({'name': "Test Category"})
+        cls.brand = env['tech.repair.device.brand'].create({'name': "Test Brand"})
+        cls.device_model = env['tech.repair.device.model'].create({
+            'name': "Test Model",
+            'brand_id': cls.brand.id,
+            'category_id': cls.category.id,
+        })
+
+    @classmethod
+    def _create_orders(cls, count=1, **values):
+        return cls.env['tech.repair.order'].create([{
+            'customer_id': cls.customer.id,
+            'worktype': cls.worktype.id,
+            'state_id': cls.state_open.id,
+            **values,
+        } for _index in range(count)])
+
+    @classmethod
+    def _create_items(cls, serials, **values):
+        return cls.env['tech.repair.inventory'].create([{
+            'serial_number': serial,
+            'brand_id': cls.brand.id,
+            'model_id': cls.device_model.id,
+            **values,
+        } for serial in serials])
@@ -0,0 +1,32 @@
+import os
+from odoo.tests import TransactionCase, tagged
+
+# Scenarios fast enough at a small scale: the inventory ones generate hundreds of thousands of rows
+QUICK_SCENARIOS = [
+    'intake', 'create_qr', 'mass_state_change', 'write_batches', 'list_load', 'status_page',
+    'pdf_render', 'batch_print', 'renewal_cron',
+]
+
+
+# Benchmark suite at a small scale, excluded from the standard test runs:
+#   odoo-bin -d <db> -u tech_repair_management --test-tags repair_bench --stop-after-init
+# Set REPAIR_BENCH_OUTPUT to a file path to keep the JSON results.
+@tagged('-standard', 'repair_bench', 'post_install', '-at_install')
+class TestRepairBenchmark(TransactionCase):
+
+    def test_benchmark_suite(self):
+        sequence = self.env.ref('tech_repair_management.tech_repair_order_sequence')
+        next_number = sequence.number_next_actual
+
+        results = self.env['tech.repair.benchmark'].run(
+            scenarios=QUICK_SCENARIOS, customers=20, orders=50,
+            output=os.environ.get('REPAIR_BENCH_OUTPUT'),
+        )
+
+        self.assertEqual(list(results['scenarios']), QUICK_SCENARIOS)
+        for scenario in ('intake', 'create_qr', 'mass_state_change', 'write_batches', 'status_page', 'renewal_cron'):
+            self.assertNotIn('error', results['scenarios'][scenario], scenario)
+        # Everything is rolled back, the numbers of the real sequence included
+        sequence.invalidate_recordset()
+        self.assertEqual(sequence.number_next_actual, next_number)
+        self.assertFalse(self.env['res.partner'].search_count([('name', '=like', 'Bench Customer %')]))
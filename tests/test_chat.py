@@ -0,0 +1,59 @@
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairChatPage(TechRepairCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.order, cls.other_order, cls.empty_order = cls._create_orders(3)
+        Chat = cls.env['tech.repair.chat.message']
+        cls.messages = Chat.create([{
+            'tech_repair_order_id': cls.order.id,
+            'sender': 'customer' if index % 2 else 'technician',
+            'message': f"Message {index}",
+        } for index in range(5)])
+        cls.other_message = Chat.create({'tech_repair_order_id': cls.other_order.id, 'message': "Other order"})
+
+    def _page(self, order, **kwargs):
+        page = self.env['tech.repair.chat.message']._get_chat_page(order, **kwargs)
+        return [message['id'] for message in page['messages']], page['has_more']
+
+    def test_latest_page(self):
+        ids = self.messages.ids
+        self.assertEqual(self._page(self.order, limit=2), (ids[3:], True))
+        self.assertEqual(self._page(self.order), (ids, False))
+
+    def test_before_cursor(self):
+        ids = self.messages.ids
+        self.assertEqual(self._page(self.order, before=ids[3], limit=2), (ids[1:3], True))
+        self.assertEqual(self._page(self.order, before=str(ids[2]), limit=2), (ids[:2], False))
+
+    def test_after_cursor(self):
+        ids = self.messages.ids
+        self.assertEqual(self._page(self.order, after=ids[1], limit=2), (ids[2:4], True))
+        self.assertEqual(self._page(self.order, after=str(ids[3])), (ids[4:], False))
+        self.assertEqual(self._page(self.order, after=ids[4]), ([], False))
+
+    def test_invalid_cursors(self):
+        ids = self.messages.ids
+        # Unknown or foreign "after": no message, never the oldest page
+        for after in ("abc", "-3", "0", self.other_message.id, ids[-1] + 1000):
+            self.assertEqual(self._page(self.order, after=after), ([], False), after)
+        # Unknown or foreign "before": the latest page
+        for before in ("abc", "1.5", self.other_message.id):
+            self.assertEqual(self._page(self.order, before=before, limit=2), (ids[3:], True), before)
+        self.assertEqual(self._page(self.order, limit="many"), (ids, False))
+
+    def test_empty_chat(self):
+        self.assertEqual(self._page(self.empty_order), ([], False))
+        self.assertEqual(self._page(self.empty_order, before=self.messages[0].id), ([], False))
+
+    def test_parse_int(self):
+        Chat = self.env['tech.repair.chat.message']
+        self.assertEqual(Chat._parse_int("42"), 42)
+        self.assertEqual(Chat._parse_int(7), 7)
+        for value in (None, False, "", "abc", "4.2", "0", "-1", [1]):
+            self.assertIsNone(Chat._parse_int(value), value)
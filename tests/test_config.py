@@ -0,0 +1,30 @@
+from unittest.mock import patch
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairConfig(TechRepairCommon):
+
+    def _patch_clear_cache(self):
+        registry = self.env.registry
+        return patch.object(registry, 'clear_cache', wraps=registry.clear_cache)
+
+    def test_default_state_follows_sequence(self):
+        Config = self.env['tech.repair.config']
+        first = self.env['tech.repair.state'].search([], order='sequence asc', limit=1)
+        self.assertEqual(Config._get_default_state(), first)
+
+        # Cold cache on this worker: the change must still clear the caches of the other workers
+        self.env.registry.clear_cache()
+        with self._patch_clear_cache() as clear_cache:
+            self.state_closed.sequence = first.sequence - 1
+        clear_cache.assert_called()
+        self.assertEqual(Config._get_default_state(), self.state_closed)
+
+    def test_unrelated_write_keeps_cache(self):
+        self.env['tech.repair.config']._get_config_values()
+        with self._patch_clear_cache() as clear_cache:
+            self.state_open.name = "Renamed"
+            self.state_closed.sequence = 100
+        clear_cache.assert_not_called()
@@ -0,0 +1,60 @@
+import base64
+from odoo.exceptions import UserError, ValidationError
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairInventory(TechRepairCommon):
+
+    def test_unique_serial_index(self):
+        self.env.cr.execute("SELECT 1 FROM pg_indexes WHERE indexname = 'tech_repair_inventory_serial_unique'")
+        self.assertTrue(self.env.cr.fetchone())
+
+    def test_duplicate_serial_on_create(self):
+        self._create_items(["INV-0001"])
+        with self.assertRaisesRegex(ValidationError, "INV-0001"):
+            self._create_items(["INV-0002", "INV-0001"])
+        # Archived items free their serial number
+        self.env['tech.repair.inventory'].search([('serial_number', '=', "INV-0001")]).active = False
+        self.assertTrue(self._create_items(["INV-0001"]))
+
+    def test_duplicate_serial_on_write(self):
+        items = self._create_items(["INV-0011", "INV-0012", "INV-0013"])
+        with self.assertRaises(ValidationError) as error:
+            items[1].serial_number = "INV-0011"
+        self.assertIn("'INV-0011'", str(error.exception))
+        self.assertNotIn("INV-0012", str(error.exception))
+        self.assertNotIn("INV-0013", str(error.exception))
+
+    def test_import_reports_duplicates_with_file_lines(self):
+        self._create_items(["IMP-EXISTING"])
+        rows = [
+            "serial_number,brand,model",
+            "IMP-0001,Test Brand,Test Model",
+            "IMP-0002,Test Brand,Unknown Model",
+            "IMP-EXISTING,Test Brand,Test Model",
+            "IMP-0001,Test Brand,Test Model",
+        ]
+        wizard = self.env['tech.repair.inventory.import'].create({
+            'file': base64.b64encode("\n".join(rows).encode()),
+            'filename': "serials.csv",
+        })
+        with self.assertRaises(UserError) as error:
+            wizard.action_import()
+        message = str(error.exception)
+        self.assertIn("Line 2: unknown model 'Unknown Model'", message)
+        self.assertIn("Line 3: serial number 'IMP-EXISTING'", message)
+        self.assertIn("Lines 1, 4: serial number 'IMP-0001'", message)
+        self.assertFalse(self.env['tech.repair.inventory'].search_count([('serial_number', '=like', 'IMP-000%')]))
+
+    def test_import(self):
+        rows = ["serial_number,brand,model,variant", "IMP-0101,Test Brand,Test Model,", "IMP-0102,Test Brand,Test Model,128GB"]
+        wizard = self.env['tech.repair.inventory.import'].create({
+            'file': base64.b64encode("\n".join(rows).encode()),
+            'filename': "serials.csv",
+        })
+        wizard.action_import()
+        self.assertEqual(wizard.imported_count, 2)
+        item = self.env['tech.repair.inventory'].search([('serial_number', '=', "IMP-0102")])
+        self.assertEqual((item.model_id, item.model_variant, item.status), (self.device_model, "128GB", 'available'))
@@ -0,0 +1,25 @@
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairNumbering(TechRepairCommon):
+
+    def test_bulk_numbering(self):
+        sequence = self.env.ref('tech_repair_management.tech_repair_order_sequence')
+        orders = self.env['tech.repair.order'].create([{
+            'customer_id': self.customer.id,
+            'worktype': self.worktype.id,
+            **values,
+        } for values in ({}, {'name': 'New'}, {'name': False}, {'name': ''}, {'name': None}, {'name': "HIST-42"})])
+
+        numbered, explicit = orders[:5], orders[5]
+        self.assertEqual(explicit.name, "HIST-42")
+        names = numbered.mapped('name')
+        self.assertTrue(all(name.startswith(sequence.prefix) for name in names), names)
+        self.assertEqual(len(set(names)), 5)
+        self.assertEqual(names, sorted(names))
+        # Tokens and defaults are set for the whole batch
+        self.assertEqual(len(set(orders.mapped('token_url'))), 6)
+        self.assertTrue(all(orders.mapped('state_id')))
+        self.assertTrue(all(orders.mapped('open_date')))
@@ -0,0 +1,49 @@
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairOrderDevice(TechRepairCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.item_a, cls.item_b, cls.item_c = cls._create_items(["DEV-A", "DEV-B", "DEV-C"])
+
+    def _device_line(self, item):
+        return (0, 0, {
+            'category_id': self.category.id,
+            'brand_id': self.brand.id,
+            'model_id': self.device_model.id,
+            'inventory_id': item.id,
+        })
+
+    def _assert_item(self, item, status, order):
+        self.assertEqual((item.status, item.repair_order_id), (status, order), item.serial_number)
+
+    def test_device_swap(self):
+        order = self._create_orders(device_ids=[self._device_line(self.item_a)])
+        self._assert_item(self.item_a, 'in_repair', order)
+
+        # Another serial on the same line: the old item is released, the new one assigned
+        order.device_ids.inventory_id = self.item_b
+        self._assert_item(self.item_a, 'available', self.env['tech.repair.order'])
+        self._assert_item(self.item_b, 'in_repair', order)
+
+        # Two lines exchanging their items in one write: both stay in repair
+        order.write({'device_ids': [self._device_line(self.item_a)]})
+        line_b, line_a = order.device_ids.sorted('id')
+        order.write({'device_ids': [(1, line_b.id, {'inventory_id': self.item_a.id}), (1, line_a.id, {'inventory_id': self.item_b.id})]})
+        self._assert_item(self.item_a, 'in_repair', order)
+        self._assert_item(self.item_b, 'in_repair', order)
+
+        # Removed line: the item is available again
+        order.write({'device_ids': [(2, line_a.id)]})
+        self._assert_item(self.item_b, 'available', self.env['tech.repair.order'])
+        self._assert_item(self.item_a, 'in_repair', order)
+
+    def test_item_of_another_order(self):
+        self._create_orders(device_ids=[self._device_line(self.item_c)])
+        with self.assertRaises(UserError):
+            self._create_orders(device_ids=[self._device_line(self.item_c)])
@@ -0,0 +1,31 @@
+from datetime import timedelta
+from odoo import fields
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRenewalReminders(TechRepairCommon):
+
+    def test_missed_and_new_renewals(self):
+        today = fields.Date.today()
+        missed, due, later = orders = self._create_orders(3)
+        missed.renewal_date = today - timedelta(days=3)
+        due.renewal_date = today + timedelta(days=30)
+        later.renewal_date = today + timedelta(days=31)
+
+        orders.check_repair_renewals(auto_commit=False)
+        self.assertEqual(orders.mapped('reminder_sent'), [True, True, False])
+        self.assertEqual(missed.renewal_notified_date, missed.renewal_date)
+
+        # Already notified renewals are not sent again
+        leads = self.env['crm.lead'].search_count([])
+        orders.check_repair_renewals(auto_commit=False)
+        self.assertEqual(self.env['crm.lead'].search_count([]), leads)
+
+        # A new renewal date needs a new reminder
+        missed.renewal_date = today + timedelta(days=20)
+        self.assertFalse(missed.reminder_sent)
+        orders.check_repair_renewals(auto_commit=False)
+        self.assertTrue(missed.reminder_sent)
+        self.assertEqual(missed.renewal_notified_date, today + timedelta(days=20))
@@ -0,0 +1,101 @@
+import threading
+from odoo import api, SUPERUSER_ID
+from odoo.exceptions import UserError
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, tagged
+from odoo.tests.common import get_db_name
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestReservation(TechRepairCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.loaner = cls.env['tech.repair.loaner_device'].create({'name': "Test Loaner", 'serial_number': "LOAN-1"})
+
+    def test_reserve_and_release(self):
+        first, second = self._create_orders(2)
+        first.loaner_device_id = self.loaner
+        self.assertEqual((self.loaner.status, self.loaner.tech_repair_order_id), ('assigned', first))
+        with self.assertRaises(UserError):
+            second.loaner_device_id = self.loaner
+        first.loaner_device_id = False
+        self.assertEqual((self.loaner.status, self.loaner.tech_repair_order_id.id), ('available', False))
+
+    def test_loaner_on_many_orders(self):
+        orders = self._create_orders(2)
+        with self.assertRaisesRegex(UserError, "one repair at a time"):
+            orders.write({'loaner_device_id': self.loaner.id})
+        self.assertEqual(self.loaner.status, 'available')
+
+
+# Real concurrent transactions, one cursor per thread like the HTTP workers: the records are
+# committed by setUp and removed by the cleanup (a TransactionCase shares one single cursor)
+@tagged('post_install', '-at_install')
+class TestReservationConcurrency(BaseCase):
+    workers = 6
+    rounds = 5
+
+    def setUp(self):
+        super().setUp()
+        self.registry = Registry(get_db_name())
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            customer = env['res.partner'].create({'name': "Concurrency Customer"})
+            worktype = env['tech.repair.worktype'].create({'name': "Concurrency Work"})
+            state = env['tech.repair.state'].create({'name': "Concurrency State", 'sequence': 1000})
+            orders = env['tech.repair.order'].create([{
+                'customer_id': customer.id,
+                'worktype': worktype.id,
+                'state_id': state.id,
+            } for _index in range(self.workers)])
+            loaner = env['tech.repair.loaner_device'].create({'name': "Concurrency Loaner", 'serial_number': "LOAN-CC"})
+            self.order_ids, self.loaner_id = orders.ids, loaner.id
+            records = [(model, record.ids) for model, record in [
+                ('tech.repair.order', orders), ('tech.repair.loaner_device', loaner),
+                ('tech.repair.state', state), ('tech.repair.worktype', worktype), ('res.partner', customer),
+            ]]
+        self.addCleanup(self._cleanup, records)
+
+    def _cleanup(self, records):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            for model, ids in records:
+                if model == 'tech.repair.order':
+                    # Repair orders cannot be deleted through the ORM, only archived
+                    cr.execute("DELETE FROM tech_repair_order WHERE id IN %s", [tuple(ids)])
+                else:
+                    env[model].browse(ids).unlink()
+
+    def test_single_winner(self):
+        # In every round all the workers reserve the same loaner for their own order at the same
+        # time and hold their transaction until everyone has tried: exactly one must succeed
+        for round_index in range(self.rounds):
+            barrier = threading.Barrier(self.workers)
+            successes, errors = [], []
+
+            def reserve(worker_index):
+                with self.registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    try:
+                        order = env['tech.repair.order'].browse(self.order_ids[worker_index])
+                        env['tech.repair.loaner_device'].browse(self.loaner_id)._reserve(order)
+                        env.flush_all()
+                        successes.append(worker_index)
+                    except UserError:
+                        pass
+                    except Exception as e:
+                        errors.append(e)
+                    finally:
+                        barrier.wait()
+                        cr.rollback()
+
+            threads = [threading.Thread(target=reserve, args=(index,)) for index in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertFalse(errors, f"round {round_index}")
+            self.assertEqual(len(successes), 1, f"round {round_index}")
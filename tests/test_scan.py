@@ -0,0 +1,43 @@
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairScan(TechRepairCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.order, cls.archived = cls._create_orders(2)
+        cls.archived.active = False
+
+    def _resolve(self, payload):
+        result = self.env['tech.repair.order'].resolve_scans([payload])[0]
+        return result['model'], result['id']
+
+    def test_resolve_order_payloads(self):
+        order = self.order
+        expected = ('tech.repair.order', order.id)
+        self.assertEqual(self._resolve(f"https://example.com/repairstatus/{order.token_url}"), expected)
+        self.assertEqual(self._resolve(f"https://example.com/repairstatus/qr/{order.token_url}"), expected)
+        self.assertEqual(self._resolve(order.token_url), expected)
+        self.assertEqual(self._resolve(f"https://example.com/web#id={order.id}&model=tech.repair.order&view_type=form"), expected)
+        self.assertEqual(self._resolve(f"https://example.com/web#model=tech.repair.order&id={order.id}"), expected)
+        self.assertEqual(self._resolve(f"https://example.com/odoo/tech.repair.order/{order.id}"), expected)
+        self.assertEqual(self._resolve(order.name), expected)
+
+    def test_resolve_other_model_link(self):
+        # Another model whose name starts with tech.repair.order is not a repair order
+        self.assertEqual(self._resolve(f"https://example.com/web#id={self.order.id}&model=tech.repair.order.device"), (False, False))
+        self.assertEqual(self._resolve(f"https://example.com/web#model=tech.repair.order.device&id={self.order.id}"), (False, False))
+
+    def test_resolve_archived_order(self):
+        archived = self.archived
+        self.assertEqual(self._resolve(archived.token_url), (False, False))
+        self.assertEqual(self._resolve(f"https://example.com/web#id={archived.id}&model=tech.repair.order"), (False, False))
+        self.assertEqual(self._resolve(archived.name), (False, False))
+
+    def test_resolve_serial(self):
+        item = self._create_items(["SCAN-0001"])
+        self.assertEqual(self._resolve("SCAN-0001"), ('tech.repair.inventory', item.id))
+        self.assertEqual(self._resolve("SCAN-UNKNOWN"), (False, False))
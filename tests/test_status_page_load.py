@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, tagged
+from odoo.tests.common import get_db_name
+
+_logger = logging.getLogger(__name__)
+
+
+# Load test of the public /repairstatus pages against the orders of a real database, excluded
+# from the standard test runs like the benchmark suite:
+#   odoo-bin -d <db> --test-tags /tech_repair_management:TestStatusPageLoad --stop-after-init
+# Each worker thread has its own cursor like the HTTP workers and hits the data path of the
+# status page (token lookup, page version, latest chat page) at the same time. Nothing is written.
+@tagged('-standard', 'repair_bench', 'post_install', '-at_install')
+class TestStatusPageLoad(BaseCase):
+    workers = 8
+    requests_per_worker = 100
+
+    def test_status_page_load(self):
+        registry = Registry(get_db_name())
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            tokens = env['tech.repair.order'].search(
+                [('token_url', '!=', False)], limit=self.requests_per_worker).mapped('token_url')
+        if not tokens:
+            self.skipTest("At least one repair order is needed.")
+
+        barrier = threading.Barrier(self.workers + 1)
+        counts = []
+
+        def status_pages():
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                RepairOrder = env['tech.repair.order']
+                Chat = env['tech.repair.chat.message']
+                barrier.wait()
+                queries = cr.sql_log_count
+                try:
+                    for index in range(self.requests_per_worker):
+                        order = RepairOrder._get_by_token(tokens[index % len(tokens)])
+                        Chat.search([('tech_repair_order_id', '=', order.id)], order='id desc', limit=1)
+                        order.last_modified_date
+                        Chat._get_chat_page(order)
+                        # Every HTTP request starts with an empty ORM cache
+                        env.invalidate_all()
+                    counts.append(cr.sql_log_count - queries)
+                finally:
+                    cr.rollback()
+
+        threads = [threading.Thread(target=status_pages) for _index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        requests = self.workers * self.requests_per_worker
+        self.assertEqual(len(counts), self.workers, "Every worker must serve all its requests")
+        _logger.info("Repair status page load test: %s", {
+            'workers': self.workers,
+            'requests': requests,
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(requests / elapsed) if elapsed else 0,
+            'queries_per_request': round(sum(counts) / requests, 2),
+        })
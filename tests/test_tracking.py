@@ -0,0 +1,50 @@
+from odoo.tests import tagged
+from .common import TechRepairCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepairTracking(TechRepairCommon):
+
+    def _last_note(self, order):
+        return str(self.env['mail.message'].search([
+            ('model', '=', order._name), ('res_id', '=', order.id),
+        ], order='id desc', limit=1).body)
+
+    def test_write_tracks_each_order_against_its_own_lines(self):
+        first = self._create_orders(problem_description="First problem", accessory_ids=[(0, 0, {'name': 'alimentatore'})])
+        second = self._create_orders(problem_description="Second problem", accessory_ids=[
+            (0, 0, {'name': 'cover'}), (0, 0, {'name': 'borsa'}),
+        ])
+        orders = first | second
+
+        orders.write({
+            'problem_description': "Same problem",
+            'accessory_ids': [(5, 0, 0), (0, 0, {'name': 'sim'})],
+        })
+
+        first_note, second_note = self._last_note(first), self._last_note(second)
+        self.assertIn("First problem", first_note)
+        self.assertNotIn("Second problem", first_note)
+        self.assertIn("Rimossi accessori: <strong>alimentatore</strong>", first_note)
+        self.assertNotIn("cover", first_note)
+
+        self.assertIn("Second problem", second_note)
+        self.assertNotIn("First problem", second_note)
+        self.assertIn("Rimossi accessori: <strong>borsa, cover</strong>", second_note)
+        self.assertNotIn("alimentatore", second_note)
+
+        for note in (first_note, second_note):
+            self.assertIn("Aggiunti accessori: <strong>sim</strong>", note)
+
+    def test_line_snapshot_is_batched(self):
+        # One query per line model, whatever the number of orders
+        line_fields = ['accessory_ids', 'credential_ids']
+        for count in (2, 20):
+            orders = self._create_orders(count, accessory_ids=[(0, 0, {'name': 'cover'})])
+            self.env.flush_all()
+            self.env.invalidate_all()
+            with self.assertQueryCount(len(line_fields)):
+                snapshot = orders._get_tracked_lines(line_fields)
+            self.assertEqual(len(snapshot), count)
+            for order in orders:
+                self.assertEqual(len(snapshot[order.id]['accessory_ids']), 1)